@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""Masking throughput benchmark.
+
+Times every masking type on its own and a mixed table through
+DataMasker.apply_masking, on synthetic values of configurable size and
+cardinality. Results can be saved as a baseline and later runs compared
+against it; a slowdown beyond the tolerance exits with status 1.
+
+    python benchmark_masking.py --rows 50000 --cardinality 5000
+    python benchmark_masking.py --save-baseline masking_baseline.json
+    python benchmark_masking.py --baseline masking_baseline.json --tolerance 0.25
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+from masking import DataMasker
+from mapping_cache import MappingCache
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Original values shaped like what each type sees in production; anything else gets "<type>-<n>"
+VALUE_GENERATORS: Dict[str, Callable[[int], Any]] = {
+    "email": lambda n: f"user{n}@example.com",
+    "phone": lambda n: f"555-{n:07d}",
+    "zip_code": lambda n: f"{n % 100000:05d}",
+    "postal_code": lambda n: f"{n % 100000:05d}",
+    "gps_coordinates": lambda n: f"{n % 90}.{n:06d}, {n % 180}.{n:06d}",
+    "card_number": lambda n: f"4111{n:012d}",
+    "ssn": lambda n: f"{n % 1000:03d}-{n % 100:02d}-{n % 10000:04d}",
+    "money_amount": lambda n: f"{n * 3.17:.2f}",
+    "birth_date": lambda n: f"19{50 + n % 50}-{1 + n % 12:02d}-{1 + n % 28:02d}",
+    "id": lambda n: f"CUST_{n:08d}",
+    "account_number": lambda n: f"{n:010d}",
+    "ip_address": lambda n: f"10.{n >> 16 & 255}.{n >> 8 & 255}.{n & 255}",
+    "mac_address": lambda n: ":".join(f"{n >> shift & 255:02x}" for shift in (40, 32, 24, 16, 8, 0)),
+    "url": lambda n: f"https://example.com/page/{n}",
+    "text": lambda n: f"Original free text value number {n}",
+    "numeric": lambda n: n * 1.5,
+}
+
+def masking_types(selected: List[str] = None) -> List[str]:
+    types = [t for t, (masker, _) in DataMasker.MASKING_TYPES.items() if masker is not None]
+    if selected:
+        unknown = set(selected) - set(types)
+        if unknown:
+            raise SystemExit(f"Unknown masking types: {', '.join(sorted(unknown))}")
+        types = [t for t in types if t in selected]
+    return types
+
+def synthetic_column(masking_type: str, rows: int, cardinality: int, seed: int = 0) -> List[Any]:
+    """rows values drawn from cardinality distinct originals"""
+    generate = VALUE_GENERATORS.get(masking_type, lambda n: f"{masking_type}-{n}")
+    distinct = [generate(n) for n in range(cardinality)]
+    rng = random.Random(seed)
+    return [distinct[rng.randrange(cardinality)] for _ in range(rows)]
+
+def synthetic_table(types: List[str], rows: int, cardinality: int) -> List[Dict[str, Any]]:
+    columns = {t: synthetic_column(t, rows, cardinality, seed) for seed, t in enumerate(types)}
+    return [{t: columns[t][i] for t in types} for i in range(rows)]
+
+def peak_rss_mb() -> float:
+    if resource is None:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def new_masker() -> DataMasker:
+    masker = DataMasker(mapping_cache=MappingCache())
+    # Build the thread's Faker before timing so every type pays the same start-up cost
+    masker.get_seeded_faker(0)
+    return masker
+
+def bench_type(masking_type: str, rows: int, cardinality: int, chunk_size: int, repeat: int) -> Dict[str, Any]:
+    """Mask one column chunk by chunk with a cold cache, keeping the best of repeat runs"""
+    values = synthetic_column(masking_type, rows, cardinality)
+    best, stats = None, None
+    for _ in range(repeat):
+        masker = new_masker()
+        start = time.perf_counter()
+        for offset in range(0, rows, chunk_size):
+            masker.mask_column(masking_type, values[offset:offset + chunk_size])
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best, stats = elapsed, masker.mapping_cache.stats()
+    return {
+        "rows_per_second": round(rows / best, 1),
+        "us_per_value": round(best * 1e6 / rows, 3),
+        "cache_hit_rate": round(stats["hit_rate"], 4),
+    }
+
+def bench_apply_masking(types: List[str], rows: int, cardinality: int, chunk_size: int, repeat: int) -> Dict[str, Any]:
+    """Mask a table with one column per type through apply_masking"""
+    data = synthetic_table(types, rows, cardinality)
+    config = {t: t for t in types}
+    best, stats = None, None
+    for _ in range(repeat):
+        masker = new_masker()
+        start = time.perf_counter()
+        for offset in range(0, rows, chunk_size):
+            masker.apply_masking(data[offset:offset + chunk_size], config)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best, stats = elapsed, masker.mapping_cache.stats()
+    return {
+        "columns": len(types),
+        "rows_per_second": round(rows / best, 1),
+        "us_per_value": round(best * 1e6 / (rows * len(types)), 3),
+        "cache_hit_rate": round(stats["hit_rate"], 4),
+    }
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Names and numbers of measurements slower than baseline by more than tolerance"""
+    if baseline.get("params") != results["params"]:
+        print(f"! Baseline was recorded with {baseline.get('params')}, comparing anyway")
+    regressions = []
+    measured = dict(results["types"])
+    recorded = dict(baseline.get("types", {}))
+    # The mixed table is only comparable when it has the same columns
+    if baseline.get("apply_masking", {}).get("columns") == results["apply_masking"]["columns"]:
+        measured["apply_masking"] = results["apply_masking"]
+        recorded["apply_masking"] = baseline["apply_masking"]
+    for name, result in measured.items():
+        previous = recorded.get(name)
+        if not previous:
+            continue
+        ratio = result["us_per_value"] / previous["us_per_value"]
+        if ratio > 1 + tolerance:
+            regressions.append(f"{name}: {previous['us_per_value']} -> {result['us_per_value']} us/value (x{ratio:.2f})")
+    return regressions
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark masking throughput")
+    parser.add_argument("--rows", type=int, default=20000, help="values per column")
+    parser.add_argument("--cardinality", type=int, default=None, help="distinct originals per column (default: rows)")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="rows per apply_masking call")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement, best is kept")
+    parser.add_argument("--types", nargs="*", help="masking types to benchmark (default: all)")
+    parser.add_argument("--baseline", help="baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown vs baseline, 0.25 = 25%%")
+    parser.add_argument("--save-baseline", help="write results to this JSON file")
+    args = parser.parse_args()
+
+    cardinality = min(args.cardinality or args.rows, args.rows)
+    types = masking_types(args.types)
+    params = {"rows": args.rows, "cardinality": cardinality, "chunk_size": args.chunk_size}
+    print(f"Masking benchmark: {args.rows} rows, {cardinality} distinct values, chunks of {args.chunk_size}")
+    print("=" * 72)
+    print(f"{'type':<24}{'rows/s':>14}{'us/value':>12}{'cache hits':>12}")
+
+    results = {"params": params, "types": {}}
+    for masking_type in types:
+        result = results["types"][masking_type] = bench_type(
+            masking_type, args.rows, cardinality, args.chunk_size, args.repeat
+        )
+        print(f"{masking_type:<24}{result['rows_per_second']:>14,.0f}{result['us_per_value']:>12.2f}"
+              f"{result['cache_hit_rate']:>12.1%}")
+
+    result = results["apply_masking"] = bench_apply_masking(types, args.rows, cardinality, args.chunk_size, args.repeat)
+    results["peak_rss_mb"] = round(peak_rss_mb(), 1)
+    print("-" * 72)
+    print(f"{'apply_masking (' + str(len(types)) + ' cols)':<24}{result['rows_per_second']:>14,.0f}"
+          f"{result['us_per_value']:>12.2f}{result['cache_hit_rate']:>12.1%}")
+    print(f"Peak RSS: {results['peak_rss_mb']} MB")
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"✓ Baseline saved to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print(f"✗ {len(regressions)} measurements slower than baseline by more than {args.tolerance:.0%}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print(f"✓ No regressions beyond {args.tolerance:.0%} of {args.baseline}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""End-to-end ship benchmark.
+
+Seeds a source table with a realistic column mix, then runs ships through
+the FastAPI app (POST /ship, polling GET /jobs/{id}) for every combination
+of row count, insert mode, batch size and masking worker count, and reports
+rows/s with the time spent reading, masking and writing.
+
+Needs a MySQL server: the one configured in .env, or a throwaway container
+started with --docker (requires Docker).
+
+    python benchmark_ship.py --docker --rows 10000 1000000
+    python benchmark_ship.py --rows 100000 --batch-sizes 1000 5000 --workers 1 4
+"""
+
+import argparse
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+from faker import Faker
+import pymysql
+
+from config import Config
+
+CONTAINER_NAME = "ship-benchmark-mysql"
+
+SOURCE_COLUMNS = """
+    id INT PRIMARY KEY,
+    customer_code VARCHAR(32),
+    first_name VARCHAR(100),
+    last_name VARCHAR(100),
+    email VARCHAR(255),
+    phone VARCHAR(64),
+    street_address VARCHAR(255),
+    city VARCHAR(100),
+    state VARCHAR(64),
+    zip_code VARCHAR(16),
+    birth_date DATE,
+    ssn VARCHAR(16),
+    balance DECIMAL(14, 2),
+    notes TEXT,
+    created_at DATETIME
+"""
+
+MASKING_CONFIG = {
+    "customer_code": "id",
+    "first_name": "first_name",
+    "last_name": "last_name",
+    "email": "email",
+    "phone": "phone",
+    "street_address": "street_address",
+    "city": "city",
+    "zip_code": "zip_code",
+    "birth_date": "birth_date",
+    "ssn": "ssn",
+    "balance": "numeric",
+}
+
+def start_container(port: int, password: str):
+    print(f"Starting MySQL container {CONTAINER_NAME} on port {port}...")
+    subprocess.run(
+        ["docker", "run", "-d", "--rm", "--name", CONTAINER_NAME, "-e", f"MYSQL_ROOT_PASSWORD={password}",
+         "-p", f"{port}:3306", "mysql:8.0", "--local-infile=1"],
+        check=True, stdout=subprocess.DEVNULL
+    )
+    deadline = time.time() + 180
+    while True:
+        try:
+            pymysql.connect(host="127.0.0.1", port=port, user="root", password=password).close()
+            print("✓ MySQL is up")
+            return
+        except pymysql.err.OperationalError:
+            if time.time() > deadline:
+                raise SystemExit("✗ MySQL container did not become ready")
+            time.sleep(2)
+
+def stop_container():
+    subprocess.run(["docker", "stop", CONTAINER_NAME], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+def synthetic_rows(start: int, count: int, pools: Dict[str, List[Any]], rng: random.Random) -> List[Dict[str, Any]]:
+    """Rows drawn from pools of realistic values so seeding millions of rows stays fast"""
+    rows = []
+    for n in range(start, start + count):
+        rows.append({
+            "id": n,
+            "customer_code": f"CUST_{n:08d}",
+            "first_name": rng.choice(pools["first_name"]),
+            "last_name": rng.choice(pools["last_name"]),
+            "email": f"customer{n}@example.com",
+            "phone": f"555-{n % 10000000:07d}",
+            "street_address": rng.choice(pools["street_address"]),
+            "city": rng.choice(pools["city"]),
+            "state": rng.choice(pools["state"]),
+            "zip_code": f"{rng.randrange(100000):05d}",
+            "birth_date": rng.choice(pools["birth_date"]),
+            "ssn": f"{rng.randrange(1000):03d}-{rng.randrange(100):02d}-{rng.randrange(10000):04d}",
+            "balance": round(rng.uniform(0, 50000), 2),
+            "notes": rng.choice(pools["notes"]),
+            "created_at": rng.choice(pools["created_at"]),
+        })
+    return rows
+
+def seed_source(db_manager, database: str, table: str, rows: int, reseed: bool):
+    """Create and fill the source table unless it already holds the requested rows"""
+    db_manager.execute_statement(None, f"CREATE DATABASE IF NOT EXISTS {database}")
+    if not reseed and db_manager.table_exists(database, table):
+        existing = db_manager.execute_query(database, f"SELECT COUNT(*) AS n FROM {table}")[0]["n"]
+        if existing == rows:
+            print(f"✓ Reusing {database}.{table} ({rows} rows)")
+            return
+
+    print(f"Seeding {database}.{table} with {rows} rows...")
+    db_manager.execute_statement(database, f"DROP TABLE IF EXISTS {table}")
+    db_manager.execute_statement(database, f"CREATE TABLE {table} ({SOURCE_COLUMNS})")
+
+    faker = Faker()
+    faker.seed_instance(Config.MASKING_SEED)
+    pools = {
+        "first_name": [faker.first_name() for _ in range(2000)],
+        "last_name": [faker.last_name() for _ in range(5000)],
+        "street_address": [faker.street_address() for _ in range(20000)],
+        "city": [faker.city() for _ in range(1000)],
+        "state": [faker.state() for _ in range(50)],
+        "birth_date": [faker.date_of_birth(minimum_age=18, maximum_age=90) for _ in range(10000)],
+        "notes": [faker.sentence() for _ in range(1000)],
+        "created_at": [faker.date_time_this_decade() for _ in range(10000)],
+    }
+    rng = random.Random(Config.MASKING_SEED)
+    start = time.perf_counter()
+    with db_manager.bulk_writer(database, table) as writer:
+        for offset in range(0, rows, 50000):
+            writer.write(synthetic_rows(offset + 1, min(50000, rows - offset), pools, rng))
+    db_manager.invalidate_metadata(database)
+    print(f"✓ Seeded in {time.perf_counter() - start:.1f}s")
+
+def run_ship(client, request: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+    """Queue a ship through the API and wait for its job to finish"""
+    response = client.post("/ship", json=request)
+    response.raise_for_status()
+    job_id = response.json()["data"]["job_id"]
+    deadline = time.time() + timeout
+    while True:
+        job = client.get(f"/jobs/{job_id}").json()["data"]
+        if job["status"] in ("completed", "failed", "cancelled"):
+            return job
+        if time.time() > deadline:
+            client.delete(f"/jobs/{job_id}")
+            raise SystemExit(f"✗ Job {job_id} did not finish within {timeout}s")
+        time.sleep(0.2)
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the full /ship path")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000], help="source table sizes")
+    parser.add_argument("--insert-modes", nargs="+", default=["insert"], choices=["insert", "load_data"])
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[Config.INSERT_BATCH_SIZE])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1], help="masking worker processes")
+    parser.add_argument("--chunk-size", type=int, default=Config.SHIP_CHUNK_SIZE)
+    parser.add_argument("--source-database", default="ship_bench_source")
+    parser.add_argument("--target-database", default="ship_bench_target")
+    parser.add_argument("--reseed", action="store_true", help="rebuild source tables even if present")
+    parser.add_argument("--timeout", type=float, default=3600, help="seconds to wait for one ship")
+    parser.add_argument("--docker", action="store_true", help="run against a throwaway MySQL container")
+    parser.add_argument("--port", type=int, default=3307, help="host port for the container")
+    parser.add_argument("--keep-container", action="store_true")
+    parser.add_argument("--output", help="write results to this JSON file")
+    args = parser.parse_args()
+
+    if args.docker:
+        password = "benchmark"
+        start_container(args.port, password)
+        Config.DB_HOST, Config.DB_PORT, Config.DB_USER, Config.DB_PASSWORD = "127.0.0.1", args.port, "root", password
+    if "load_data" in args.insert_modes:
+        Config.DB_LOCAL_INFILE = True
+    # Keep benchmark jobs out of the service's job history
+    job_store_dir = tempfile.mkdtemp(prefix="ship-benchmark-")
+    Config.JOB_STORE_PATH = os.path.join(job_store_dir, "jobs.db")
+
+    # Imported after configuration so the app's database manager and job store pick it up
+    from fastapi.testclient import TestClient
+    import main as app_module
+
+    results = []
+    try:
+        with TestClient(app_module.app) as client:
+            for rows in args.rows:
+                table = f"customers_{rows}"
+                seed_source(app_module.db_manager, args.source_database, table, rows, args.reseed)
+                app_module.db_manager.execute_statement(None, f"CREATE DATABASE IF NOT EXISTS {args.target_database}")
+
+                print(f"\n{rows} rows")
+                print(f"{'mode':<10}{'batch':>8}{'workers':>9}{'rows/s':>12}{'total s':>9}"
+                      f"{'read s':>9}{'mask s':>9}{'write s':>9}")
+                for mode, batch_size, workers in itertools.product(args.insert_modes, args.batch_sizes, args.workers):
+                    job = run_ship(client, {
+                        "source_database": args.source_database,
+                        "source_table": table,
+                        "target_database": args.target_database,
+                        "target_table": table,
+                        "masking_config": MASKING_CONFIG,
+                        "chunk_size": args.chunk_size,
+                        "cache_scope": "job",
+                        "masking_workers": workers,
+                        "insert_mode": mode,
+                        "insert_batch_size": batch_size,
+                    }, args.timeout)
+                    if job["status"] != "completed":
+                        print(f"✗ {mode} batch={batch_size} workers={workers} {job['status']}: {job['error']}")
+                        continue
+
+                    phases = job["phase_seconds"]
+                    elapsed = job["finished_at"] - job["started_at"]
+                    results.append({
+                        "rows": rows,
+                        "insert_mode": mode,
+                        "batch_size": batch_size,
+                        "workers": workers,
+                        "seconds": round(elapsed, 3),
+                        "rows_per_second": round(job["rows_written"] / elapsed, 1),
+                        "phase_seconds": phases,
+                    })
+                    print(f"{mode:<10}{batch_size:>8}{workers:>9}{job['rows_written'] / elapsed:>12,.0f}{elapsed:>9.2f}"
+                          f"{phases.get('reading', 0):>9.2f}{phases.get('masking', 0):>9.2f}{phases.get('writing', 0):>9.2f}")
+    finally:
+        if args.docker and not args.keep_container:
+            stop_container()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✓ Results saved to {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
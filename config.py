@@ -17,6 +17,60 @@ class Config:
     
     MASKING_SEED = 12345  # Static seed for referential integrity
     
+    # Per-value seed derivation: "md5" (legacy, default) or "blake2b" (keyed with SECRET_KEY, faster)
+    SEED_ALGORITHM = os.getenv("SEED_ALGORITHM", "md5")
+    
+    # Seconds schema metadata (databases, tables, columns) stays cached; 0 disables
+    METADATA_CACHE_TTL = float(os.getenv("METADATA_CACHE_TTL", 60))
+    
+    # Seconds sampled /preview rows are reused, so switching masking types doesn't re-query
+    PREVIEW_SAMPLE_TTL = float(os.getenv("PREVIEW_SAMPLE_TTL", 30))
+    
+    # Number of rows read, masked and inserted per batch when shipping
+    SHIP_CHUNK_SIZE = int(os.getenv("SHIP_CHUNK_SIZE", 5000))
+    
+    # Connection pool settings for the cached SQLAlchemy engines
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+    DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", 30))
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    
+    # Budget for the original -> masked mapping cache (LRU eviction beyond these)
+    MAPPING_CACHE_MAX_ENTRIES = int(os.getenv("MAPPING_CACHE_MAX_ENTRIES", 1000000))
+    MAPPING_CACHE_MAX_BYTES = int(os.getenv("MAPPING_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+    
+    # SQLite file for the persistent token vault (empty = disabled)
+    TOKEN_VAULT_PATH = os.getenv("TOKEN_VAULT_PATH", "")
+    
+    # Worker processes used to mask chunks during a ship (1 = mask in-process)
+    MASKING_WORKERS = int(os.getenv("MASKING_WORKERS", 1))
+    
+    # Threads for blocking API work and for concurrently running ships
+    API_THREADS = int(os.getenv("API_THREADS", 16))
+    SHIP_CONCURRENCY = int(os.getenv("SHIP_CONCURRENCY", 2))
+    SHIP_TABLE_PARALLELISM = int(os.getenv("SHIP_TABLE_PARALLELISM", 4))
+    
+    # Bulk writes: "insert" (multi-row INSERT) or "load_data" (LOAD DATA LOCAL INFILE)
+    INSERT_MODE = os.getenv("INSERT_MODE", "insert")
+    INSERT_BATCH_SIZE = int(os.getenv("INSERT_BATCH_SIZE", 5000))
+    INSERT_COMMIT_INTERVAL = int(os.getenv("INSERT_COMMIT_INTERVAL", 50000))
+    DB_LOCAL_INFILE = os.getenv("DB_LOCAL_INFILE", "false").lower() == "true"
+    
+    # How /ship clears the target: "delete", "truncate" or "swap" (load a shadow table, then RENAME)
+    TARGET_REFRESH_STRATEGY = os.getenv("TARGET_REFRESH_STRATEGY", "delete")
+    
+    # Readiness probe: SELECT 1 timeout, how long a result is reused, and job count that reports busy (0 = never)
+    READINESS_TIMEOUT = float(os.getenv("READINESS_TIMEOUT", 2))
+    READINESS_CACHE_SECONDS = float(os.getenv("READINESS_CACHE_SECONDS", 5))
+    READINESS_MAX_ACTIVE_JOBS = int(os.getenv("READINESS_MAX_ACTIVE_JOBS", 0))
+    
+    # Record Prometheus metrics and serve them on /metrics
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    
+    # SQLite file holding ship job status
+    JOB_STORE_PATH = os.getenv("JOB_STORE_PATH", "ship_jobs.db")
+    
     @classmethod
     def reload(cls):
         """Reload environment variables"""
@@ -26,4 +80,30 @@ class Config:
         cls.DB_USER = os.getenv("DB_USER", "root")
         cls.DB_PASSWORD = os.getenv("DB_PASSWORD", "")
         cls.SECRET_KEY = os.getenv("SECRET_KEY", "fallback-secret-key")
+        cls.SEED_ALGORITHM = os.getenv("SEED_ALGORITHM", "md5")
+        cls.METADATA_CACHE_TTL = float(os.getenv("METADATA_CACHE_TTL", 60))
+        cls.PREVIEW_SAMPLE_TTL = float(os.getenv("PREVIEW_SAMPLE_TTL", 30))
+        cls.SHIP_CHUNK_SIZE = int(os.getenv("SHIP_CHUNK_SIZE", 5000))
+        cls.DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+        cls.DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+        cls.DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", 30))
+        cls.DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+        cls.DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+        cls.MAPPING_CACHE_MAX_ENTRIES = int(os.getenv("MAPPING_CACHE_MAX_ENTRIES", 1000000))
+        cls.MAPPING_CACHE_MAX_BYTES = int(os.getenv("MAPPING_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+        cls.TOKEN_VAULT_PATH = os.getenv("TOKEN_VAULT_PATH", "")
+        cls.MASKING_WORKERS = int(os.getenv("MASKING_WORKERS", 1))
+        cls.API_THREADS = int(os.getenv("API_THREADS", 16))
+        cls.SHIP_CONCURRENCY = int(os.getenv("SHIP_CONCURRENCY", 2))
+        cls.SHIP_TABLE_PARALLELISM = int(os.getenv("SHIP_TABLE_PARALLELISM", 4))
+        cls.INSERT_MODE = os.getenv("INSERT_MODE", "insert")
+        cls.INSERT_BATCH_SIZE = int(os.getenv("INSERT_BATCH_SIZE", 5000))
+        cls.INSERT_COMMIT_INTERVAL = int(os.getenv("INSERT_COMMIT_INTERVAL", 50000))
+        cls.DB_LOCAL_INFILE = os.getenv("DB_LOCAL_INFILE", "false").lower() == "true"
+        cls.TARGET_REFRESH_STRATEGY = os.getenv("TARGET_REFRESH_STRATEGY", "delete")
+        cls.READINESS_TIMEOUT = float(os.getenv("READINESS_TIMEOUT", 2))
+        cls.READINESS_CACHE_SECONDS = float(os.getenv("READINESS_CACHE_SECONDS", 5))
+        cls.READINESS_MAX_ACTIVE_JOBS = int(os.getenv("READINESS_MAX_ACTIVE_JOBS", 0))
+        cls.METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+        cls.JOB_STORE_PATH = os.getenv("JOB_STORE_PATH", "ship_jobs.db")
 
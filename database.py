@@ -1,11 +1,164 @@
+import logging
+import os
 import pymysql
+import random
+import re
+import tempfile
+import threading
+from datetime import date, datetime, time, timedelta
+from time import perf_counter
 from sqlalchemy import create_engine, text
-from typing import List, Dict, Any
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+from typing import List, Dict, Any, Iterator, Tuple
+import metrics
 from config import Config
+from metadata_cache import MetadataCache
+
+logger = logging.getLogger(__name__)
+
+# Primary key types that PK-range sampling can seek into
+_INTEGER_TYPE = re.compile(r"^(tiny|small|medium|big)?int\b", re.IGNORECASE)
+
+# Characters escaped in LOAD DATA's default TSV format (FIELDS ESCAPED BY '\\')
+_TSV_ESCAPES = {ord('\\'): '\\\\', ord('\t'): '\\t', ord('\n'): '\\n', ord('\r'): '\\r', 0: '\\0'}
+
+def _tsv_field(value: Any) -> str:
+    """Render one value as a LOAD DATA INFILE field"""
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, (bytes, bytearray)):
+        value = bytes(value).decode('utf-8', errors='surrogateescape')
+    elif isinstance(value, (datetime, date, time, timedelta)):
+        return str(value)
+    return str(value).translate(_TSV_ESCAPES)
+
+class _TimedQueuePool(QueuePool):
+    """QueuePool recording how long each checkout takes, including waits for a free connection"""
+    
+    def _do_get(self):
+        started = perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            metrics.POOL_CHECKOUT_SECONDS.observe(perf_counter() - started)
+
+class BulkWriter:
+    """Write row chunks to one table over a single connection.
+    
+    "insert" mode sends multi-row INSERT statements sized to the server's
+    max_allowed_packet; "load_data" mode writes each chunk as TSV and loads it
+    with LOAD DATA LOCAL INFILE (requires DB_LOCAL_INFILE and local_infile on
+    the server). Commits every commit_interval rows and once more on close.
+    """
+    
+    def __init__(self, engine: Engine, table_name: str, mode: str = "insert",
+                 batch_size: int = None, commit_interval: int = None, defer_checks: bool = False):
+        if mode not in ("insert", "load_data"):
+            raise ValueError(f"Unknown insert mode: {mode}")
+        self.table_name = table_name
+        self.mode = mode
+        self.batch_size = batch_size or Config.INSERT_BATCH_SIZE
+        self.commit_interval = commit_interval or Config.INSERT_COMMIT_INTERVAL
+        self.rows_written = 0
+        self._rows_since_commit = 0
+        self._connection = engine.raw_connection()
+        self._cursor = self._connection.cursor()
+        
+        # Let PyMySQL pack as many rows per INSERT as the server accepts, leaving headroom
+        self._cursor.execute("SELECT @@max_allowed_packet")
+        max_allowed_packet = int(self._cursor.fetchone()[0])
+        self._cursor.max_stmt_length = max(max_allowed_packet - 64 * 1024, 1024 * 1024)
+        
+        # Skip per-row unique and foreign key checks while loading a table nobody reads yet
+        self.defer_checks = defer_checks
+        if defer_checks:
+            self._cursor.execute("SET unique_checks = 0, foreign_key_checks = 0")
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+    
+    def write(self, data: List[Dict[str, Any]], skip_duplicates: bool = False):
+        """Write a chunk of rows, committing when the commit interval is reached.
+        
+        With skip_duplicates, rows whose key already exists in the table are
+        left as they are instead of failing the write.
+        """
+        if not data:
+            return
+        columns = list(data[0].keys())
+        for start in range(0, len(data), self.batch_size):
+            batch = data[start:start + self.batch_size]
+            if self.mode == "load_data":
+                self._load_data(columns, batch, skip_duplicates)
+            else:
+                query = f"INSERT INTO {self.table_name} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+                if skip_duplicates:
+                    # A no-op update rather than INSERT IGNORE, so other errors still surface
+                    query += f" ON DUPLICATE KEY UPDATE {columns[0]} = {columns[0]}"
+                self._cursor.executemany(query, [tuple(row[col] for col in columns) for row in batch])
+            self.rows_written += len(batch)
+            self._rows_since_commit += len(batch)
+            if self._rows_since_commit >= self.commit_interval:
+                self.commit()
+    
+    def _load_data(self, columns: List[str], batch: List[Dict[str, Any]], skip_duplicates: bool = False):
+        with tempfile.NamedTemporaryFile('w', encoding='utf-8', errors='surrogateescape',
+                                         newline='\n', suffix='.tsv', delete=False) as tsv_file:
+            for row in batch:
+                tsv_file.write('\t'.join(_tsv_field(row[col]) for col in columns))
+                tsv_file.write('\n')
+        try:
+            path = tsv_file.name.replace('\\', '/')
+            self._cursor.execute(
+                f"LOAD DATA LOCAL INFILE '{path}' {'IGNORE ' if skip_duplicates else ''}INTO TABLE {self.table_name} "
+                f"CHARACTER SET utf8mb4 ({', '.join(columns)})"
+            )
+        finally:
+            os.unlink(tsv_file.name)
+    
+    def commit(self):
+        self._connection.commit()
+        self._rows_since_commit = 0
+    
+    def close(self):
+        """Commit outstanding rows and return the connection to the pool"""
+        try:
+            self.commit()
+        finally:
+            self._release()
+    
+    def abort(self):
+        """Roll back uncommitted rows and return the connection to the pool"""
+        try:
+            self._connection.rollback()
+        finally:
+            self._release()
+    
+    def _release(self):
+        try:
+            if self.defer_checks:
+                self._cursor.execute("SET unique_checks = 1, foreign_key_checks = 1")
+        finally:
+            self._connection.close()
 
 class DatabaseManager:
     def __init__(self):
         self.config = Config()
+        # Pooled engines keyed by (host, port, database), created on first use
+        self._engines: Dict[tuple, Engine] = {}
+        self._engines_lock = threading.Lock()
+        self.metadata_cache = MetadataCache()
+        # Sampled preview rows, kept briefly so re-masking a table doesn't query it again
+        self.sample_cache = MetadataCache(ttl=self.config.PREVIEW_SAMPLE_TTL)
     
     def get_connection_url(self, database_name: str = None):
         """Create database connection URL"""
@@ -17,10 +170,67 @@ class DatabaseManager:
             return f"mysql+pymysql://{self.config.DB_USER}:{encoded_password}@{self.config.DB_HOST}:{self.config.DB_PORT}/{database_name}?charset=utf8mb4"
         return f"mysql+pymysql://{self.config.DB_USER}:{encoded_password}@{self.config.DB_HOST}:{self.config.DB_PORT}?charset=utf8mb4"
     
+    def get_engine(self, database_name: str = None) -> Engine:
+        """Get a cached, pooled engine for the given database"""
+        key = (self.config.DB_HOST, self.config.DB_PORT, database_name)
+        engine = self._engines.get(key)
+        if engine is not None:
+            return engine
+        
+        with self._engines_lock:
+            engine = self._engines.get(key)
+            if engine is None:
+                engine = create_engine(
+                    self.get_connection_url(database_name),
+                    poolclass=_TimedQueuePool if metrics.ENABLED else QueuePool,
+                    pool_size=self.config.DB_POOL_SIZE,
+                    max_overflow=self.config.DB_MAX_OVERFLOW,
+                    pool_timeout=self.config.DB_POOL_TIMEOUT,
+                    pool_recycle=self.config.DB_POOL_RECYCLE,
+                    pool_pre_ping=self.config.DB_POOL_PRE_PING,
+                    connect_args={"local_infile": self.config.DB_LOCAL_INFILE}
+                )
+                self._engines[key] = engine
+            return engine
+    
+    def dispose(self):
+        """Close all pooled connections and drop cached engines"""
+        with self._engines_lock:
+            for engine in self._engines.values():
+                engine.dispose()
+            self._engines.clear()
+    
+    def ping(self):
+        """Run SELECT 1 on a pooled server connection"""
+        engine = self.get_engine()
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    
+    def pool_status(self) -> Dict[str, Dict[str, int]]:
+        """Connection pool usage of each cached engine"""
+        status = {}
+        for (host, port, database_name), engine in list(self._engines.items()):
+            pool = engine.pool
+            status[database_name or ""] = {
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "overflow": max(pool.overflow(), 0),
+                "capacity": pool.size() + self.config.DB_MAX_OVERFLOW
+            }
+        return status
+    
+    def invalidate_metadata(self, database_name: str = None, table_name: str = None):
+        """Forget cached schema metadata and preview samples, e.g. after creating or replacing a table"""
+        self.metadata_cache.invalidate(database_name, table_name)
+        self.sample_cache.invalidate(database_name, table_name)
+    
     def get_databases(self) -> List[str]:
         """Get list of available databases"""
+        return self.metadata_cache.get_or_load(("databases", None, None), self._load_databases)
+    
+    def _load_databases(self) -> List[str]:
         try:
-            engine = create_engine(self.get_connection_url())
+            engine = self.get_engine()
             with engine.connect() as conn:
                 result = conn.execute(text("SHOW DATABASES"))
                 databases = [row[0] for row in result.fetchall()]
@@ -32,8 +242,11 @@ class DatabaseManager:
     
     def get_tables(self, database_name: str) -> List[str]:
         """Get list of tables in a database"""
+        return self.metadata_cache.get_or_load(("tables", database_name, None), lambda: self._load_tables(database_name))
+    
+    def _load_tables(self, database_name: str) -> List[str]:
         try:
-            engine = create_engine(self.get_connection_url(database_name))
+            engine = self.get_engine(database_name)
             with engine.connect() as conn:
                 result = conn.execute(text("SHOW TABLES"))
                 return [row[0] for row in result.fetchall()]
@@ -42,29 +255,84 @@ class DatabaseManager:
     
     def get_table_columns(self, database_name: str, table_name: str) -> List[Dict[str, Any]]:
         """Get column information for a table"""
+        key = ("columns", database_name, table_name)
+        columns = self.metadata_cache.get(key)
+        # Loading the whole database only pays off when the other tables stay cached
+        if columns is None and self.metadata_cache.ttl > 0 and self.metadata_cache.get(("columns", database_name, None)) is None:
+            # One information_schema query caches every table of the database
+            for name, table_columns in self.get_database_columns(database_name).items():
+                self.metadata_cache.set(("columns", database_name, name), table_columns)
+            self.metadata_cache.set(("columns", database_name, None), True)
+            columns = self.metadata_cache.get(key)
+        if columns is None:
+            # Unknown to information_schema (or caching disabled): DESCRIBE reports the real error
+            columns = self._describe_table(database_name, table_name)
+        return columns
+    
+    def get_database_columns(self, database_name: str) -> Dict[str, List[Dict[str, Any]]]:
+        """Get column information for every table of a database in one round trip"""
         try:
-            engine = create_engine(self.get_connection_url(database_name))
+            engine = self.get_engine(database_name)
             with engine.connect() as conn:
-                query = text(f"DESCRIBE {table_name}")
-                result = conn.execute(query)
-                columns = []
-                for row in result.fetchall():
-                    columns.append({
-                        "name": row[0],
-                        "type": row[1],
-                        "null": row[2],
-                        "key": row[3],
-                        "default": row[4],
-                        "extra": row[5]
+                query = text(
+                    "SELECT TABLE_NAME, COLUMN_NAME, COLUMN_TYPE, IS_NULLABLE, COLUMN_KEY, COLUMN_DEFAULT, EXTRA "
+                    "FROM information_schema.COLUMNS WHERE TABLE_SCHEMA = :schema "
+                    "ORDER BY TABLE_NAME, ORDINAL_POSITION"
+                )
+                tables = {}
+                for row in conn.execute(query, {"schema": database_name}).fetchall():
+                    tables.setdefault(row[0], []).append({
+                        "name": row[1],
+                        "type": row[2],
+                        "null": row[3],
+                        "key": row[4],
+                        "default": row[5],
+                        "extra": row[6]
                     })
-                return columns
+                return tables
+        except Exception as e:
+            raise Exception(f"Failed to get columns for database {database_name}: {str(e)}")
+    
+    def _describe_table(self, database_name: str, table_name: str) -> List[Dict[str, Any]]:
+        try:
+            engine = self.get_engine(database_name)
+            with engine.connect() as conn:
+                return self._describe(conn, table_name)
         except Exception as e:
             raise Exception(f"Failed to get columns for table {table_name}: {str(e)}")
     
+    def _describe(self, conn, table_name: str) -> List[Dict[str, Any]]:
+        result = conn.execute(text(f"DESCRIBE {table_name}"))
+        columns = []
+        for row in result.fetchall():
+            columns.append({
+                "name": row[0],
+                "type": row[1],
+                "null": row[2],
+                "key": row[3],
+                "default": row[4],
+                "extra": row[5]
+            })
+        return columns
+    
+    def estimate_row_count(self, database_name: str, table_name: str) -> int:
+        """Get the approximate row count from table statistics, without scanning"""
+        try:
+            engine = self.get_engine(database_name)
+            with engine.connect() as conn:
+                query = text(
+                    "SELECT TABLE_ROWS FROM information_schema.TABLES "
+                    "WHERE TABLE_SCHEMA = :schema AND TABLE_NAME = :table"
+                )
+                row = conn.execute(query, {"schema": database_name, "table": table_name}).fetchone()
+                return int(row[0]) if row and row[0] is not None else 0
+        except Exception as e:
+            raise Exception(f"Failed to estimate row count for table {table_name}: {str(e)}")
+    
     def get_sample_data(self, database_name: str, table_name: str, limit: int = 10) -> List[Dict[str, Any]]:
         """Get sample data from a table"""
         try:
-            engine = create_engine(self.get_connection_url(database_name))
+            engine = self.get_engine(database_name)
             with engine.connect() as conn:
                 query = text(f"SELECT * FROM {table_name} LIMIT {limit}")
                 result = conn.execute(query)
@@ -73,10 +341,70 @@ class DatabaseManager:
         except Exception as e:
             raise Exception(f"Failed to get sample data from table {table_name}: {str(e)}")
     
+    def get_preview_sample(self, database_name: str, table_name: str, limit: int = 10, sampling: str = "first",
+                           refresh: bool = False) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Get columns and sample rows of a table over one connection, cached for PREVIEW_SAMPLE_TTL.
+        
+        "first" returns the first rows; "random" and "stratified" seek to random
+        points of an integer primary key's range (uniform, or one per equal
+        slice of the range), so no query scans or sorts the whole table. Tables
+        without a single integer primary key fall back to "first".
+        """
+        key = ("sample", database_name, table_name, sampling, limit)
+        if not refresh:
+            cached = self.sample_cache.get(key)
+            if cached is not None:
+                return cached
+        
+        try:
+            engine = self.get_engine(database_name)
+            with engine.connect() as conn:
+                columns = self.metadata_cache.get(("columns", database_name, table_name))
+                if columns is None:
+                    columns = self._describe(conn, table_name)
+                    self.metadata_cache.set(("columns", database_name, table_name), columns)
+                
+                key_columns = [col for col in columns if col["key"] == "PRI"]
+                if sampling != "first" and len(key_columns) == 1 and _INTEGER_TYPE.match(key_columns[0]["type"]):
+                    rows = self._sample_key_range(conn, table_name, key_columns[0]["name"], limit, sampling)
+                else:
+                    result = conn.execute(text(f"SELECT * FROM {table_name} LIMIT :limit"), {"limit": limit})
+                    rows = [dict(zip(result.keys(), row)) for row in result.fetchall()]
+        except Exception as e:
+            raise Exception(f"Failed to sample table {table_name}: {str(e)}")
+        
+        self.sample_cache.set(key, (columns, rows))
+        return columns, rows
+    
+    def _sample_key_range(self, conn, table_name: str, key_column: str, limit: int, sampling: str) -> List[Dict[str, Any]]:
+        low, high = conn.execute(text(f"SELECT MIN({key_column}), MAX({key_column}) FROM {table_name}")).fetchone()
+        if low is None or limit <= 0:
+            return []
+        
+        rng = random.Random()
+        span = high - low + 1
+        if sampling == "stratified":
+            points = [low + (span * i) // limit + rng.randrange(max(span // limit, 1)) for i in range(limit)]
+        else:
+            points = [rng.randint(low, high) for _ in range(limit)]
+        
+        # One round trip: each branch is a primary key seek to the first row at or after its point
+        query = " UNION ALL ".join(
+            f"SELECT * FROM (SELECT * FROM {table_name} WHERE {key_column} >= :p{i} ORDER BY {key_column} LIMIT 1) AS s{i}"
+            for i in range(len(points))
+        )
+        result = conn.execute(text(query), {f"p{i}": point for i, point in enumerate(points)})
+        rows = {}
+        for row in result.fetchall():
+            record = dict(zip(result.keys(), row))
+            # Points falling in the same gap of the key range land on the same row
+            rows.setdefault(record[key_column], record)
+        return [rows[key] for key in sorted(rows)]
+    
     def execute_query(self, database_name: str, query: str) -> List[Dict[str, Any]]:
         """Execute a custom query"""
         try:
-            engine = create_engine(self.get_connection_url(database_name))
+            engine = self.get_engine(database_name)
             with engine.connect() as conn:
                 result = conn.execute(text(query))
                 columns = result.keys()
@@ -84,16 +412,134 @@ class DatabaseManager:
         except Exception as e:
             raise Exception(f"Failed to execute query: {str(e)}")
     
+    def execute_statement(self, database_name: str, statement: str, foreign_key_checks: bool = True) -> int:
+        """Execute a statement that returns no rows (DDL, DELETE, ...) and commit it.
+        
+        With foreign_key_checks=False the statement may clear, rename or drop
+        tables that other tables' foreign keys still reference.
+        """
+        try:
+            engine = self.get_engine(database_name)
+            with engine.begin() as conn:
+                if foreign_key_checks:
+                    return conn.execute(text(statement)).rowcount
+                conn.execute(text("SET foreign_key_checks = 0"))
+                try:
+                    return conn.execute(text(statement)).rowcount
+                finally:
+                    # The session goes back to the pool
+                    conn.execute(text("SET foreign_key_checks = 1"))
+        except Exception as e:
+            raise Exception(f"Failed to execute statement: {str(e)}")
+    
+    def table_exists(self, database_name: str, table_name: str) -> bool:
+        """Check whether a table exists in a database, bypassing the metadata cache"""
+        return table_name in self._load_tables(database_name)
+    
+    def stream_query(self, database_name: str, query: str, chunk_size: int = 5000) -> Iterator[List[Dict[str, Any]]]:
+        """Execute a query and yield its rows in chunks using a server-side cursor.
+        
+        Close the generator when stopping early: the query is then killed
+        instead of its remaining rows being read and thrown away.
+        """
+        try:
+            engine = self.get_engine(database_name)
+            with engine.connect() as conn:
+                result = conn.execution_options(stream_results=True, yield_per=chunk_size).execute(text(query))
+                finished = False
+                try:
+                    columns = list(result.keys())
+                    for partition in result.partitions():
+                        yield [dict(zip(columns, row)) for row in partition]
+                    finished = True
+                finally:
+                    if not finished:
+                        self._abandon_stream(engine, conn, result)
+        except Exception as e:
+            raise Exception(f"Failed to stream query: {str(e)}")
+    
+    def _abandon_stream(self, engine: Engine, conn, result):
+        """Stop an unbuffered query part way and keep its connection out of the pool.
+        
+        Closing the result or returning the connection would make PyMySQL read
+        every remaining row first, so the query is killed from another connection.
+        """
+        try:
+            thread_id = conn.connection.dbapi_connection.thread_id()
+            with engine.connect() as killer:
+                killer.execute(text(f"KILL QUERY {int(thread_id)}"))
+            # Only reads what was sent before the kill, up to the interruption error
+            result.close()
+        except Exception as e:
+            logger.debug(f"Stopping streamed query: {str(e)}")
+        conn.invalidate()
+    
+    def bulk_writer(self, database_name: str, table_name: str, mode: str = None,
+                    batch_size: int = None, commit_interval: int = None, defer_checks: bool = False) -> BulkWriter:
+        """Open a writer that bulk-loads chunks into a table over one pooled connection"""
+        try:
+            return BulkWriter(self.get_engine(database_name), table_name, mode or self.config.INSERT_MODE,
+                              batch_size, commit_interval, defer_checks)
+        except Exception as e:
+            raise Exception(f"Failed to open writer for {table_name}: {str(e)}")
+    
+    def get_table_dependencies(self, database_name: str) -> Dict[str, List[str]]:
+        """Map each table to the tables its foreign keys reference within the same database"""
+        try:
+            engine = self.get_engine(database_name)
+            with engine.connect() as conn:
+                query = text(
+                    "SELECT DISTINCT TABLE_NAME, REFERENCED_TABLE_NAME FROM information_schema.KEY_COLUMN_USAGE "
+                    "WHERE TABLE_SCHEMA = :schema AND REFERENCED_TABLE_SCHEMA = :schema "
+                    "AND REFERENCED_TABLE_NAME IS NOT NULL"
+                )
+                dependencies = {}
+                for table_name, referenced_table in conn.execute(query, {"schema": database_name}).fetchall():
+                    dependencies.setdefault(table_name, []).append(referenced_table)
+                return dependencies
+        except Exception as e:
+            raise Exception(f"Failed to get foreign key dependencies for database {database_name}: {str(e)}")
+    
+    def get_primary_key(self, database_name: str, table_name: str) -> List[str]:
+        """Get primary key column names of a table"""
+        return [col["name"] for col in self.get_table_columns(database_name, table_name) if col["key"] == "PRI"]
+    
+    def stream_keyset(self, database_name: str, table_name: str, key_columns: List[str],
+                      chunk_size: int = 5000, after: List[Any] = None, where: str = None) -> Iterator[List[Dict[str, Any]]]:
+        """Yield rows in primary key order, one keyset-paginated query per chunk, starting after a key"""
+        order_by = ', '.join(key_columns)
+        try:
+            engine = self.get_engine(database_name)
+            while True:
+                params = {"limit": chunk_size}
+                conditions = [f"({where})"] if where else []
+                if after is not None:
+                    placeholders = ', '.join(f':key_{i}' for i in range(len(key_columns)))
+                    conditions.append(f"({order_by}) > ({placeholders})")
+                    params.update({f"key_{i}": value for i, value in enumerate(after)})
+                where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+                
+                with engine.connect() as conn:
+                    query = text(f"SELECT * FROM {table_name} {where_clause} ORDER BY {order_by} LIMIT :limit")
+                    result = conn.execute(query, params)
+                    columns = list(result.keys())
+                    chunk = [dict(zip(columns, row)) for row in result.fetchall()]
+                
+                if not chunk:
+                    return
+                yield chunk
+                if len(chunk) < chunk_size:
+                    return
+                after = [chunk[-1][col] for col in key_columns]
+        except Exception as e:
+            raise Exception(f"Failed to read table {table_name} in key order: {str(e)}")
+    
     def insert_data(self, database_name: str, table_name: str, data: List[Dict[str, Any]]) -> bool:
         """Insert masked data into target table"""
         try:
-            engine = create_engine(self.get_connection_url(database_name))
-            with engine.begin() as conn:  # Use begin() for auto-commit
-                if data:
-                    columns = list(data[0].keys())
-                    placeholders = ', '.join([f':{col}' for col in columns])
-                    query = text(f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({placeholders})")
-                    conn.execute(query, data)
-                return True
+            if data:
+                with self.bulk_writer(database_name, table_name) as writer:
+                    writer.write(data)
+            return True
         except Exception as e:
             raise Exception(f"Failed to insert data into {table_name}: {str(e)}")
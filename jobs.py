@@ -0,0 +1,296 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import date, datetime, time as time_of_day, timedelta
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+import metrics
+from config import Config
+from models import ShipCheckpoint, ShipJob, ShipJobStatus, ShippingRequest
+
+logger = logging.getLogger(__name__)
+
+# Identifies this service process in the jobs it owns
+_PROCESS_ID = uuid.uuid4().hex
+
+def _encode_key_value(value: Any) -> Any:
+    """JSON-safe form of a primary key value, tagged so its type survives the job store"""
+    if isinstance(value, (bytes, bytearray)):
+        return {"bytes": bytes(value).hex()}
+    if isinstance(value, datetime):
+        return {"datetime": value.isoformat()}
+    if isinstance(value, date):
+        return {"date": value.isoformat()}
+    if isinstance(value, time_of_day):
+        return {"time": value.isoformat()}
+    if isinstance(value, timedelta):
+        return {"timedelta": value.total_seconds()}
+    if isinstance(value, Decimal):
+        return {"decimal": str(value)}
+    return value
+
+def _decode_key_value(value: Any) -> Any:
+    if not isinstance(value, dict) or len(value) != 1:
+        return value
+    kind, encoded = next(iter(value.items()))
+    decoders = {
+        "bytes": bytes.fromhex,
+        "datetime": datetime.fromisoformat,
+        "date": date.fromisoformat,
+        "time": time_of_day.fromisoformat,
+        "timedelta": lambda seconds: timedelta(seconds=seconds),
+        "decimal": Decimal,
+    }
+    return decoders[kind](encoded) if kind in decoders else value
+
+def _owner_alive(job: ShipJob) -> bool:
+    """Whether the service process that queued a job is still running"""
+    if job.owner_pid == os.getpid():
+        return job.owner_id == _PROCESS_ID
+    if job.owner_pid is None or os.name == "nt":
+        # os.kill would terminate the process on Windows rather than probe it
+        return False
+    try:
+        os.kill(job.owner_pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Exists but belongs to another user
+        pass
+    return True
+
+class ShipCancelled(Exception):
+    """Raised inside a running ship when its job has been cancelled"""
+
+class JobStore:
+    """Ship jobs persisted in a local SQLite file so status survives refreshes and restarts"""
+
+    def __init__(self, path: str = None):
+        self.path = path or Config.JOB_STORE_PATH
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS ship_jobs (job_id TEXT PRIMARY KEY, created_at REAL, data TEXT)"
+        )
+        self._conn.commit()
+        self._cancel_events: Dict[str, threading.Event] = {}
+
+    def mark_interrupted(self) -> int:
+        """Fail jobs left queued or running by a service process that has exited; run once at startup"""
+        interrupted = 0
+        with self._lock, self._conn:
+            # Hold the write lock so no other process updates these jobs in between
+            self._conn.execute("BEGIN IMMEDIATE")
+            rows = self._conn.execute(
+                "SELECT data FROM ship_jobs WHERE json_extract(data, '$.status') IN ('queued', 'running')"
+            ).fetchall()
+            for row in rows:
+                job = ShipJob.model_validate_json(row[0])
+                if _owner_alive(job):
+                    continue
+                job.status = "failed"
+                job.phase = "interrupted"
+                job.error = "Service restarted before the job finished"
+                job.finished_at = job.finished_at or time.time()
+                self._write(job)
+                interrupted += 1
+        return interrupted
+
+    def create(self, request: ShippingRequest) -> ShipJob:
+        """Register a new queued ship job"""
+        job = ShipJob(job_id=uuid.uuid4().hex, request=request, created_at=time.time(),
+                      owner_pid=os.getpid(), owner_id=_PROCESS_ID)
+        self._cancel_events[job.job_id] = threading.Event()
+        self.save(job)
+        return job
+
+    def save(self, job: ShipJob):
+        with self._lock, self._conn:
+            self._write(job)
+
+    def _write(self, job: ShipJob):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO ship_jobs (job_id, created_at, data) VALUES (?, ?, ?)",
+            (job.job_id, job.created_at, job.model_dump_json())
+        )
+
+    def get(self, job_id: str) -> Optional[ShipJob]:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM ship_jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return ShipJob.model_validate_json(row[0]) if row else None
+
+    def list(self, limit: int = 100) -> List[ShipJob]:
+        """Most recent jobs first"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT data FROM ship_jobs ORDER BY created_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [ShipJob.model_validate_json(row[0]) for row in rows]
+
+    def cancel(self, job_id: str) -> Optional[ShipJob]:
+        """Request cancellation; queued jobs are cancelled immediately, running ones at the next chunk"""
+        job = self.get(job_id)
+        if job is None:
+            return None
+        event = self._cancel_events.get(job_id)
+        if event is not None:
+            event.set()
+        if job.status == "queued":
+            job.status = job.phase = "cancelled"
+            job.finished_at = time.time()
+            self.save(job)
+        return job
+
+    def requeue(self, job_id: str) -> Optional[ShipJob]:
+        """Queue a failed or cancelled job again; it continues from its checkpoint if it has one.
+        
+        Returns None if the job is not failed or cancelled. The status check and
+        the update are one transaction, so concurrent resumes queue a job once.
+        """
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            row = self._conn.execute("SELECT data FROM ship_jobs WHERE job_id = ?", (job_id,)).fetchone()
+            job = ShipJob.model_validate_json(row[0]) if row else None
+            if job is None or job.status not in ("failed", "cancelled"):
+                return None
+            job.status = job.phase = "queued"
+            job.error = None
+            job.finished_at = None
+            job.owner_pid, job.owner_id = os.getpid(), _PROCESS_ID
+            self._cancel_events[job_id] = threading.Event()
+            self._write(job)
+        return job
+
+    def is_cancelled(self, job_id: str) -> bool:
+        event = self._cancel_events.get(job_id)
+        return event is not None and event.is_set()
+
+    def finish(self, job_id: str):
+        """Forget in-memory state for a job that is no longer running"""
+        self._cancel_events.pop(job_id, None)
+
+    def active_count(self) -> int:
+        return len(self._cancel_events)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+class JobTracker:
+    """Progress reporting for one ship; without a store it only keeps counters in memory"""
+
+    def __init__(self, store: JobStore = None, job: ShipJob = None):
+        self.store = store
+        self.job = job
+        self._phase_started = None
+
+    def _save(self):
+        if self.store is not None and self.job is not None:
+            self.store.save(self.job)
+
+    def _end_phase(self):
+        """Add the time since the last phase change to the current phase"""
+        if self._phase_started is None:
+            return
+        now = time.monotonic()
+        phase = self.job.phase
+        elapsed = now - self._phase_started
+        self.job.phase_seconds[phase] = round(self.job.phase_seconds.get(phase, 0.0) + elapsed, 6)
+        metrics.PHASE_SECONDS.observe(elapsed, operation="ship", phase=phase)
+        self._phase_started = now
+    
+    def start(self, total_rows_estimate: Optional[int] = None):
+        if self.job is None:
+            return
+        self.job.status = "running"
+        self.job.started_at = time.time()
+        self._phase_started = time.monotonic()
+        self.job.total_rows_estimate = total_rows_estimate
+        self._save()
+
+    def set_phase(self, phase: str):
+        if self.job is not None and self.job.phase != phase:
+            self._end_phase()
+            self.job.phase = phase
+            self._save()
+
+    def add(self, read: int = 0, masked: int = 0, written: int = 0):
+        if self.job is None:
+            return
+        self.job.rows_read += read
+        self.job.rows_masked += masked
+        self.job.rows_written += written
+        for stage, rows in (("read", read), ("masked", masked), ("written", written)):
+            if rows:
+                metrics.ROWS.inc(rows, stage=stage)
+        # Persist once per written chunk rather than on every counter change
+        if written:
+            self._save()
+
+    def checkpoint(self, last_key: List, rows_written: int):
+        """Record the last committed source key so a restarted job can continue after it"""
+        if self.job is None:
+            return
+        checkpoint = ShipCheckpoint(last_key=[_encode_key_value(value) for value in last_key], rows_written=rows_written)
+        # Keep the previous checkpoint in memory unless the new one was stored
+        if self.store is not None:
+            self.store.save(self.job.model_copy(update={"checkpoint": checkpoint}))
+        self.job.checkpoint = checkpoint
+
+    def resume_from(self) -> Optional[ShipCheckpoint]:
+        """Checkpoint to resume from, resetting counters to what was committed"""
+        if self.job is None or self.job.checkpoint is None:
+            return None
+        committed = self.job.checkpoint.rows_written
+        self.job.rows_read = self.job.rows_masked = self.job.rows_written = committed
+        return ShipCheckpoint(
+            last_key=[_decode_key_value(value) for value in self.job.checkpoint.last_key],
+            rows_written=committed
+        )
+
+    def check_cancelled(self):
+        if self.store is not None and self.job is not None and self.store.is_cancelled(self.job.job_id):
+            raise ShipCancelled(f"Job {self.job.job_id} was cancelled")
+
+    def complete(self, result):
+        if self.job is None:
+            return
+        self._end_phase()
+        self.job.status = self.job.phase = "completed"
+        self.job.result = result
+        self.job.finished_at = time.time()
+        self._save()
+
+    def fail(self, error: str, status: str = "failed"):
+        if self.job is None:
+            return
+        # Never raises, so a job can always leave the running state
+        try:
+            self._end_phase()
+            self.job.status = self.job.phase = status
+            self.job.error = error
+            self.job.finished_at = time.time()
+            self._save()
+        except Exception as e:
+            logger.error(f"Could not record failure of job {self.job.job_id}: {str(e)}")
+            try:
+                # Retry without the checkpoint, the only field holding source data
+                self.job.checkpoint = None
+                self._save()
+            except Exception as e:
+                logger.error(f"Could not record failure of job {self.job.job_id} without its checkpoint: {str(e)}")
+
+def job_status(job: ShipJob) -> ShipJobStatus:
+    """Add throughput and ETA to a stored job"""
+    status = ShipJobStatus(**job.model_dump())
+    if job.started_at:
+        elapsed = (job.finished_at or time.time()) - job.started_at
+        if elapsed > 0:
+            status.rows_per_second = round(job.rows_written / elapsed, 1)
+        if job.status == "running" and status.rows_per_second and job.total_rows_estimate:
+            remaining = max(job.total_rows_estimate - job.rows_written, 0)
+            status.eta_seconds = round(remaining / status.rows_per_second, 1)
+    return status
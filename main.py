@@ -1,16 +1,26 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any
+import asyncio
+import functools
+import hashlib
 import logging
 import os
+import time
 from dotenv import load_dotenv
 
 # Load environment variables at startup
 load_dotenv(override=True)
 
+from config import Config
 from database import DatabaseManager
-from masking import DataMasker
+from masking import DataMasker, MaskingProfile
 from models import *
+import metrics
+from jobs import JobStore, job_status
+from shipping import run_database_ship, run_ship_job
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -42,6 +52,40 @@ logger.info(f"DB_PASSWORD: {'SET' if os.getenv('DB_PASSWORD') else 'NOT_SET'}")
 # Initialize services
 db_manager = DatabaseManager()
 data_masker = DataMasker()
+job_store = JobStore()
+
+# Bounded pools for blocking DB and masking work, kept off the event loop
+api_executor = ThreadPoolExecutor(max_workers=Config.API_THREADS, thread_name_prefix="api")
+ship_executor = ThreadPoolExecutor(max_workers=Config.SHIP_CONCURRENCY, thread_name_prefix="ship")
+
+async def run_blocking(func, *args, executor: ThreadPoolExecutor = None):
+    """Run a blocking call in a worker thread and await its result"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor or api_executor, functools.partial(func, *args))
+
+def etag_response(http_request: Request, payload: ApiResponse) -> Response:
+    """Serialize a response with an ETag, answering 304 when the client already has it"""
+    body = payload.model_dump_json()
+    etag = f'"{hashlib.sha1(body.encode()).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if http_request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@app.on_event("startup")
+def startup():
+    """Fail jobs whose service process exited before they finished"""
+    interrupted = job_store.mark_interrupted()
+    if interrupted:
+        logger.info(f"Marked {interrupted} ship jobs from a previous run as interrupted")
+
+@app.on_event("shutdown")
+def shutdown():
+    """Stop worker threads and release pooled database connections"""
+    api_executor.shutdown(wait=False, cancel_futures=True)
+    ship_executor.shutdown(wait=False, cancel_futures=True)
+    db_manager.dispose()
+    job_store.close()
 
 @app.get("/", response_model=ApiResponse)
 async def root():
@@ -53,31 +97,31 @@ async def root():
     )
 
 @app.get("/databases", response_model=ApiResponse)
-async def get_databases():
+async def get_databases(http_request: Request):
     """Get list of available databases"""
     try:
-        databases = db_manager.get_databases()
-        return ApiResponse(
+        databases = await run_blocking(db_manager.get_databases)
+        return etag_response(http_request, ApiResponse(
             success=True,
             message="Databases retrieved successfully",
             data=databases
-        )
+        ))
     except Exception as e:
         logger.error(f"Error getting databases: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/databases/{database_name}/tables", response_model=ApiResponse)
-async def get_tables(database_name: str):
+async def get_tables(database_name: str, http_request: Request):
     """Get list of tables in a database"""
     try:
         logger.info(f"Getting tables for database: {database_name}")
-        tables = db_manager.get_tables(database_name)
+        tables = await run_blocking(db_manager.get_tables, database_name)
         logger.info(f"Found {len(tables)} tables in database {database_name}")
-        return ApiResponse(
+        return etag_response(http_request, ApiResponse(
             success=True,
             message=f"Tables retrieved successfully for database {database_name}",
             data=tables
-        )
+        ))
     except Exception as e:
         logger.error(f"Error getting tables for database {database_name}: {str(e)}")
         import traceback
@@ -85,24 +129,35 @@ async def get_tables(database_name: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/databases/{database_name}/tables/{table_name}/columns", response_model=ApiResponse)
-async def get_table_columns(database_name: str, table_name: str):
+async def get_table_columns(database_name: str, table_name: str, http_request: Request):
     """Get column information for a table"""
     try:
-        columns = db_manager.get_table_columns(database_name, table_name)
-        return ApiResponse(
+        columns = await run_blocking(db_manager.get_table_columns, database_name, table_name)
+        return etag_response(http_request, ApiResponse(
             success=True,
             message=f"Columns retrieved successfully for table {table_name}",
             data=columns
-        )
+        ))
     except Exception as e:
         logger.error(f"Error getting columns for table {table_name}: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/metadata/invalidate", response_model=ApiResponse)
+async def invalidate_metadata(database_name: str = None, table_name: str = None):
+    """Drop cached schema metadata so the next request reads it from the database"""
+    db_manager.invalidate_metadata(database_name, table_name)
+    return ApiResponse(
+        success=True,
+        message="Metadata cache invalidated",
+        data={"database_name": database_name, "table_name": table_name}
+    )
+
 @app.post("/sample-data", response_model=ApiResponse)
 async def get_sample_data(request: SampleDataRequest):
     """Get sample data from a table"""
     try:
-        sample_data = db_manager.get_sample_data(
+        sample_data = await run_blocking(
+            db_manager.get_sample_data,
             request.database_name, 
             request.table_name, 
             request.limit
@@ -131,27 +186,33 @@ async def get_masking_types():
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/preview", response_model=ApiResponse)
-async def preview_masked_data(request: PreviewRequest):
-    """Preview how data will look after masking"""
+async def preview_masked_data(request: PreviewRequest, profile: bool = False):
+    """Preview how data will look after masking; profile=true adds per column and type timings"""
     try:
-        # Get original data
-        original_data = db_manager.get_sample_data(
+        # Get column information and original data over one connection, reusing a recent sample
+        started = time.perf_counter()
+        columns, original_data = await run_blocking(
+            db_manager.get_preview_sample,
             request.database_name,
             request.table_name,
-            request.limit
+            request.limit,
+            request.sampling,
+            request.refresh_sample
         )
-        
-        # Get column information
-        columns = db_manager.get_table_columns(request.database_name, request.table_name)
+        metrics.PHASE_SECONDS.observe(time.perf_counter() - started, operation="preview", phase="reading")
         
         # Apply masking
-        masked_data = data_masker.apply_masking(original_data, request.masking_config)
+        masking_profile = MaskingProfile() if profile else None
+        started = time.perf_counter()
+        masked_data = await run_blocking(data_masker.apply_masking, original_data, request.masking_config, masking_profile)
+        metrics.PHASE_SECONDS.observe(time.perf_counter() - started, operation="preview", phase="masking")
         
         preview = DataPreview(
             original_data=original_data,
             masked_data=masked_data,
             columns=columns,
-            masking_config=request.masking_config
+            masking_config=request.masking_config,
+            profile=masking_profile.to_dict() if masking_profile else None
         )
         
         return ApiResponse(
@@ -165,7 +226,7 @@ async def preview_masked_data(request: PreviewRequest):
 
 @app.post("/ship", response_model=ApiResponse)
 async def ship_data(request: ShippingRequest):
-    """Ship masked data to target environment"""
+    """Queue a job that ships masked data to target environment"""
     try:
         # Security check: Ensure masking config is not empty for sensitive operations
         if not request.masking_config or all(v == 'none' for v in request.masking_config.values()):
@@ -175,66 +236,123 @@ async def ship_data(request: ShippingRequest):
                 detail="At least one column must have masking applied for security"
             )
         
-        # Get all data from source table
-        source_data = db_manager.execute_query(
-            request.source_database,
-            f"SELECT * FROM {request.source_table}"
-        )
-        
-        if not source_data:
-            raise HTTPException(status_code=400, detail="No data found in source table")
+        # Ships get their own pool so they never starve metadata requests
+        job = await run_blocking(job_store.create, request)
+        queued = {"job_id": job.job_id, "status": job.status}
+        ship_executor.submit(run_ship_job, job, job_store, db_manager, data_masker)
+        logger.info(f"Queued ship job {job.job_id} for {request.source_database}.{request.source_table}")
         
-        # Apply masking
-        masked_data = data_masker.apply_masking(source_data, request.masking_config)
-        
-        # Create target table if requested (copy structure)
-        if request.create_table_if_not_exists:
-            try:
-                # Get source table structure
-                create_table_query = f"""
-                CREATE TABLE IF NOT EXISTS {request.target_table} 
-                LIKE {request.source_database}.{request.source_table}
-                """
-                db_manager.execute_query(request.target_database, create_table_query)
-            except Exception as e:
-                logger.warning(f"Could not create table structure: {str(e)}")
-        
-        # Clear target table before inserting
-        try:
-            db_manager.execute_query(request.target_database, f"DELETE FROM {request.target_table}")
-        except Exception as e:
-            logger.warning(f"Could not clear target table: {str(e)}")
-        
-        # Insert masked data
-        db_manager.insert_data(request.target_database, request.target_table, masked_data)
-        
-        result = ShippingResult(
+        return ApiResponse(
             success=True,
-            message="Data shipped successfully",
-            records_transferred=len(masked_data),
-            target_database=request.target_database,
-            target_table=request.target_table
+            message="Ship job queued",
+            data=queued
         )
-        
-        logger.info(f"Successfully shipped {len(masked_data)} records to {request.target_database}.{request.target_table}")
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error queueing ship job: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/ship-database", response_model=ApiResponse)
+async def ship_database(request: DatabaseShippingRequest):
+    """Queue jobs that ship several tables of a database, respecting foreign key order"""
+    if not request.tables:
+        raise HTTPException(status_code=400, detail="At least one table must be selected")
+    
+    # Security check: every table must have masking applied, as for single-table ships
+    unmasked = [table for table, config in request.tables.items()
+                if not config or all(v == 'none' for v in config.values())]
+    if unmasked:
+        logger.warning(f"Attempted to ship tables without any masking applied: {unmasked}")
+        raise HTTPException(
+            status_code=400,
+            detail=f"At least one column must have masking applied for security in tables: {', '.join(unmasked)}"
+        )
+    
+    try:
+        jobs = {}
+        for table in request.tables:
+            jobs[table] = await run_blocking(job_store.create, request.table_request(table))
+        queued = {table: job.job_id for table, job in jobs.items()}
+        ship_executor.submit(run_database_ship, request, jobs, job_store, db_manager)
+        logger.info(f"Queued database ship of {len(jobs)} tables from {request.source_database}")
         
         return ApiResponse(
             success=True,
-            message="Data shipped successfully",
-            data=result.dict()
+            message=f"Queued {len(jobs)} table ship jobs",
+            data={"jobs": queued}
         )
-    except HTTPException:
-        raise
     except Exception as e:
-        logger.error(f"Error shipping data: {str(e)}")
+        logger.error(f"Error queueing database ship: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/jobs", response_model=ApiResponse)
+async def list_jobs(limit: int = 50):
+    """List recent ship jobs"""
+    jobs = await run_blocking(job_store.list, limit)
+    return ApiResponse(
+        success=True,
+        message="Jobs retrieved successfully",
+        data=[job_status(job).dict() for job in jobs]
+    )
+
+@app.get("/jobs/{job_id}", response_model=ApiResponse)
+async def get_job(job_id: str):
+    """Get progress, throughput and ETA of a ship job"""
+    job = await run_blocking(job_store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return ApiResponse(
+        success=True,
+        message="Job retrieved successfully",
+        data=job_status(job).dict()
+    )
+
+@app.post("/jobs/{job_id}/resume", response_model=ApiResponse)
+async def resume_job(job_id: str):
+    """Re-run a failed or cancelled ship job, continuing from its checkpoint if it has one"""
+    job = await run_blocking(job_store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    if job.status not in ("failed", "cancelled"):
+        raise HTTPException(status_code=409, detail=f"Job {job_id} is {job.status}")
+    
+    job = await run_blocking(job_store.requeue, job_id)
+    if job is None:
+        # Another request resumed it first
+        raise HTTPException(status_code=409, detail=f"Job {job_id} is already queued")
+    queued = job_status(job).dict()
+    ship_executor.submit(run_ship_job, job, job_store, db_manager, data_masker)
+    logger.info(f"Resuming ship job {job_id} from {job.checkpoint.rows_written if job.checkpoint else 0} rows")
+    
+    return ApiResponse(
+        success=True,
+        message=f"Job {job_id} queued to resume",
+        data=queued
+    )
+
+@app.delete("/jobs/{job_id}", response_model=ApiResponse)
+async def cancel_job(job_id: str):
+    """Cancel a queued or running ship job"""
+    job = await run_blocking(job_store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    if job.status in ("completed", "failed", "cancelled"):
+        raise HTTPException(status_code=409, detail=f"Job {job_id} already {job.status}")
+    
+    job = await run_blocking(job_store.cancel, job_id)
+    return ApiResponse(
+        success=True,
+        message=f"Cancellation requested for job {job_id}",
+        data=job_status(job).dict()
+    )
+
 @app.get("/health", response_model=ApiResponse)
 async def health_check():
     """Health check endpoint"""
     try:
         # Test database connection
-        databases = db_manager.get_databases()
+        databases = await run_blocking(db_manager.get_databases)
         return ApiResponse(
             success=True,
             message="Service is healthy",
@@ -244,6 +362,74 @@ async def health_check():
         logger.error(f"Health check failed: {str(e)}")
         raise HTTPException(status_code=503, detail="Service unhealthy")
 
+@app.get("/livez")
+async def liveness():
+    """Liveness probe: the process is serving requests, no I/O"""
+    return {"status": "ok"}
+
+# Last database check, reused for READINESS_CACHE_SECONDS so probes don't hammer MySQL
+_readiness = {"checked_at": 0.0, "database": None}
+_readiness_lock = asyncio.Lock()
+
+async def _check_database() -> str:
+    async with _readiness_lock:
+        if time.monotonic() - _readiness["checked_at"] >= Config.READINESS_CACHE_SECONDS:
+            try:
+                await asyncio.wait_for(run_blocking(db_manager.ping), Config.READINESS_TIMEOUT)
+                _readiness["database"] = "OK"
+            except asyncio.TimeoutError:
+                _readiness["database"] = f"timed out after {Config.READINESS_TIMEOUT}s"
+            except Exception as e:
+                logger.error(f"Readiness check failed: {str(e)}")
+                _readiness["database"] = "unavailable"
+            _readiness["checked_at"] = time.monotonic()
+        return _readiness["database"]
+
+@app.get("/readyz")
+async def readiness():
+    """Readiness probe: cached pooled SELECT 1, plus pool saturation and active jobs"""
+    database = await _check_database()
+    pools = db_manager.pool_status()
+    checked_out = sum(pool["checked_out"] for pool in pools.values())
+    capacity = sum(pool["capacity"] for pool in pools.values())
+    active_jobs = job_store.active_count()
+    busy = 0 < Config.READINESS_MAX_ACTIVE_JOBS <= active_jobs
+    
+    ready = database == "OK" and not busy
+    content = {
+        "status": "ready" if ready else "not ready",
+        "database": database,
+        "active_jobs": active_jobs,
+        "busy": busy,
+        "pool_checked_out": checked_out,
+        "pool_saturation": round(checked_out / capacity, 3) if capacity else 0.0,
+        "pools": pools
+    }
+    return JSONResponse(status_code=200 if ready else 503, content=content)
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus metrics in the text exposition format"""
+    if not metrics.ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    
+    # Gauges read from live state at scrape time
+    metrics.POOL_CHECKED_OUT.clear()
+    metrics.POOL_CAPACITY.clear()
+    for database, pool in db_manager.pool_status().items():
+        metrics.POOL_CHECKED_OUT.set(pool["checked_out"], database=database)
+        metrics.POOL_CAPACITY.set(pool["capacity"], database=database)
+    
+    stats = data_masker.mapping_cache.stats()
+    for namespace, counts in stats["namespaces"].items():
+        metrics.CACHE_HITS.set(counts["hits"], namespace=namespace)
+        metrics.CACHE_MISSES.set(counts["misses"], namespace=namespace)
+    metrics.CACHE_HIT_RATIO.set(stats["hit_rate"])
+    metrics.CACHE_ENTRIES.set(stats["entries"])
+    metrics.ACTIVE_JOBS.set(job_store.active_count())
+    
+    return Response(content=metrics.render(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -2,44 +2,133 @@ import random
 import hashlib
 import re
 import ipaddress
+import threading
+import time
 from faker import Faker
-from typing import Any, Dict, List
+from types import MethodType
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 from datetime import datetime, timedelta
+import metrics
 from config import Config
+from mapping_cache import MappingCache
+from token_vault import TokenVault
 
-class DataMasker:
+class MaskingProfile:
+    """Cumulative masking time, masker calls and cache hits per column and per masking type.
+    
+    Cache hits are read from the mapping cache's counters, so they also
+    count hits by other ships sharing that cache at the same time.
+    """
+    
     def __init__(self):
+        self.columns: Dict[str, Dict[str, Any]] = {}
+        self.types: Dict[str, Dict[str, Any]] = {}
+    
+    def record(self, column: str, masking_type: str, seconds: float, values: int, calls: int, cache_hits: int):
+        for entries, key in ((self.columns, column), (self.types, masking_type)):
+            entry = entries.get(key)
+            if entry is None:
+                entry = entries[key] = {"seconds": 0.0, "values": 0, "calls": 0, "cache_hits": 0}
+                if entries is self.columns:
+                    entry["masking_type"] = masking_type
+            entry["seconds"] += seconds
+            entry["values"] += values
+            entry["calls"] += calls
+            entry["cache_hits"] += cache_hits
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Entries sorted slowest first, with microseconds per value"""
+        def report(entries: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+            ordered = sorted(entries.items(), key=lambda item: item[1]["seconds"], reverse=True)
+            return {
+                key: dict(entry, seconds=round(entry["seconds"], 6),
+                          us_per_value=round(entry["seconds"] * 1e6 / entry["values"], 3) if entry["values"] else 0.0)
+                for key, entry in ordered
+            }
+        return {
+            "total_seconds": round(sum(entry["seconds"] for entry in self.columns.values()), 6),
+            "columns": report(self.columns),
+            "types": report(self.types)
+        }
+
+class DataMasker:
+    def __init__(self, mapping_cache: MappingCache = None, token_vault: TokenVault = None):
         self.config = Config()
         self.faker = Faker()
-        # Set seed for referential integrity
-        random.seed(self.config.MASKING_SEED)
+        metrics.FAKER_CONSTRUCTIONS.inc(locale="default")
+        # Seed the shared Faker; maskers use per-value generators instead of global state
         Faker.seed(self.config.MASKING_SEED)
         
         # Cache for maintaining referential integrity
-        self.mapping_cache = {}
+        self.mapping_cache = mapping_cache if mapping_cache is not None else MappingCache()
+        
+        # Optional persistent store shared across workers and restarts
+        if token_vault is None and self.config.TOKEN_VAULT_PATH:
+            token_vault = TokenVault(self.config.TOKEN_VAULT_PATH)
+        self.token_vault = token_vault
+        
+        # "md5" reproduces seeds of existing lower environments; "blake2b" is keyed with SECRET_KEY
+        if self.config.SEED_ALGORITHM == "blake2b":
+            self._seed_key = self.config.SECRET_KEY.encode()[:64]
+            self._seed_from_bytes = self._blake2b_seed
+        elif self.config.SEED_ALGORITHM == "md5":
+            self._seed_from_bytes = self._md5_seed
+        else:
+            raise ValueError(f"Unknown SEED_ALGORITHM: {self.config.SEED_ALGORITHM}")
+        
+        # Long-lived Faker generators, one per thread and locale
+        self._faker_local = threading.local()
+    
+    def get_seeded_random(self, seed: int) -> random.Random:
+        """Get a private generator for a single value, leaving the global random state untouched"""
+        return random.Random(seed)
+    
+    def get_seeded_faker(self, seed: int, locale: str = None) -> Faker:
+        """Get this thread's Faker for a locale, reseeded for a single value"""
+        fakers = getattr(self._faker_local, 'fakers', None)
+        if fakers is None:
+            fakers = self._faker_local.fakers = {}
+        
+        faker = fakers.get(locale)
+        if faker is None:
+            faker = fakers[locale] = Faker(locale)
+            metrics.FAKER_CONSTRUCTIONS.inc(locale=locale or "default")
+        
+        faker.seed_instance(seed)
+        return faker
+    
+    def _md5_seed(self, data: bytes) -> int:
+        # Same value as the original int(md5(...).hexdigest()[:8], 16), without the hex round trip
+        return int.from_bytes(hashlib.md5(data).digest()[:4], 'big')
+    
+    def _blake2b_seed(self, data: bytes) -> int:
+        return int.from_bytes(hashlib.blake2b(data, digest_size=8, key=self._seed_key).digest(), 'big')
     
     def get_deterministic_seed(self, value: Any) -> int:
         """Generate deterministic seed from value for referential integrity"""
         if value is None:
             return 0
-        str_value = str(value)
-        return int(hashlib.md5(str_value.encode()).hexdigest()[:8], 16)
+        return self._seed_from_bytes(str(value).encode())
+    
+    def get_deterministic_seeds(self, values: List[Any]) -> List[int]:
+        """Generate deterministic seeds for a batch of values"""
+        seed_from_bytes = self._seed_from_bytes
+        return [0 if value is None else seed_from_bytes(str(value).encode()) for value in values]
     
     def mask_first_name(self, original_value: Any) -> str:
         """Mask first names"""
         if original_value is None:
             return None
         
-        cache_key = f"first_name_{original_value}"
-        if cache_key in self.mapping_cache:
-            return self.mapping_cache[cache_key]
+        cached = self.mapping_cache.get('first_name', original_value)
+        if cached is not None:
+            return cached
         
         seed = self.get_deterministic_seed(original_value)
-        temp_faker = Faker()
-        temp_faker.seed_instance(seed)
+        temp_faker = self.get_seeded_faker(seed)
         
         masked_value = temp_faker.first_name()
-        self.mapping_cache[cache_key] = masked_value
+        self.mapping_cache.set('first_name', original_value, masked_value)
         return masked_value
     
     def mask_last_name(self, original_value: Any) -> str:
@@ -47,16 +136,15 @@ class DataMasker:
         if original_value is None:
             return None
         
-        cache_key = f"last_name_{original_value}"
-        if cache_key in self.mapping_cache:
-            return self.mapping_cache[cache_key]
+        cached = self.mapping_cache.get('last_name', original_value)
+        if cached is not None:
+            return cached
         
         seed = self.get_deterministic_seed(original_value)
-        temp_faker = Faker()
-        temp_faker.seed_instance(seed)
+        temp_faker = self.get_seeded_faker(seed)
         
         masked_value = temp_faker.last_name()
-        self.mapping_cache[cache_key] = masked_value
+        self.mapping_cache.set('last_name', original_value, masked_value)
         return masked_value
     
     def mask_full_name(self, original_value: Any) -> str:
@@ -64,16 +152,15 @@ class DataMasker:
         if original_value is None:
             return None
         
-        cache_key = f"full_name_{original_value}"
-        if cache_key in self.mapping_cache:
-            return self.mapping_cache[cache_key]
+        cached = self.mapping_cache.get('full_name', original_value)
+        if cached is not None:
+            return cached
         
         seed = self.get_deterministic_seed(original_value)
-        temp_faker = Faker()
-        temp_faker.seed_instance(seed)
+        temp_faker = self.get_seeded_faker(seed)
         
         masked_value = temp_faker.name()
-        self.mapping_cache[cache_key] = masked_value
+        self.mapping_cache.set('full_name', original_value, masked_value)
         return masked_value
     
     def mask_organization(self, original_value: Any) -> str:
@@ -81,16 +168,15 @@ class DataMasker:
         if original_value is None:
             return None
         
-        cache_key = f"organization_{original_value}"
-        if cache_key in self.mapping_cache:
-            return self.mapping_cache[cache_key]
+        cached = self.mapping_cache.get('organization', original_value)
+        if cached is not None:
+            return cached
         
         seed = self.get_deterministic_seed(original_value)
-        temp_faker = Faker()
-        temp_faker.seed_instance(seed)
+        temp_faker = self.get_seeded_faker(seed)
         
         masked_value = temp_faker.company()
-        self.mapping_cache[cache_key] = masked_value
+        self.mapping_cache.set('organization', original_value, masked_value)
         return masked_value
     
     def mask_email(self, original_value: Any) -> str:
@@ -98,16 +184,15 @@ class DataMasker:
         if original_value is None:
             return None
         
-        cache_key = f"email_{original_value}"
-        if cache_key in self.mapping_cache:
-            return self.mapping_cache[cache_key]
+        cached = self.mapping_cache.get('email', original_value)
+        if cached is not None:
+            return cached
         
         seed = self.get_deterministic_seed(original_value)
-        temp_faker = Faker()
-        temp_faker.seed_instance(seed)
+        temp_faker = self.get_seeded_faker(seed)
         
         masked_value = temp_faker.email()
-        self.mapping_cache[cache_key] = masked_value
+        self.mapping_cache.set('email', original_value, masked_value)
         return masked_value
     
     def mask_phone(self, original_value: Any) -> str:
@@ -115,16 +200,15 @@ class DataMasker:
         if original_value is None:
             return None
         
-        cache_key = f"phone_{original_value}"
-        if cache_key in self.mapping_cache:
-            return self.mapping_cache[cache_key]
+        cached = self.mapping_cache.get('phone', original_value)
+        if cached is not None:
+            return cached
         
         seed = self.get_deterministic_seed(original_value)
-        temp_faker = Faker()
-        temp_faker.seed_instance(seed)
+        temp_faker = self.get_seeded_faker(seed)
         
         masked_value = temp_faker.phone_number()
-        self.mapping_cache[cache_key] = masked_value
+        self.mapping_cache.set('phone', original_value, masked_value)
         return masked_value
     
     def mask_street_address(self, original_value: Any) -> str:
@@ -132,16 +216,15 @@ class DataMasker:
         if original_value is None:
             return None
         
-        cache_key = f"street_address_{original_value}"
-        if cache_key in self.mapping_cache:
-            return self.mapping_cache[cache_key]
+        cached = self.mapping_cache.get('street_address', original_value)
+        if cached is not None:
+            return cached
         
         seed = self.get_deterministic_seed(original_value)
-        temp_faker = Faker()
-        temp_faker.seed_instance(seed)
+        temp_faker = self.get_seeded_faker(seed)
         
         masked_value = temp_faker.street_address()
-        self.mapping_cache[cache_key] = masked_value
+        self.mapping_cache.set('street_address', original_value, masked_value)
         return masked_value
     
     def mask_city(self, original_value: Any) -> str:
@@ -149,16 +232,15 @@ class DataMasker:
         if original_value is None:
             return None
         
-        cache_key = f"city_{original_value}"
-        if cache_key in self.mapping_cache:
-            return self.mapping_cache[cache_key]
+        cached = self.mapping_cache.get('city', original_value)
+        if cached is not None:
+            return cached
         
         seed = self.get_deterministic_seed(original_value)
-        temp_faker = Faker()
-        temp_faker.seed_instance(seed)
+        temp_faker = self.get_seeded_faker(seed)
         
         masked_value = temp_faker.city()
-        self.mapping_cache[cache_key] = masked_value
+        self.mapping_cache.set('city', original_value, masked_value)
         return masked_value
     
     def mask_state(self, original_value: Any) -> str:
@@ -166,16 +248,15 @@ class DataMasker:
         if original_value is None:
             return None
         
-        cache_key = f"state_{original_value}"
-        if cache_key in self.mapping_cache:
-            return self.mapping_cache[cache_key]
+        cached = self.mapping_cache.get('state', original_value)
+        if cached is not None:
+            return cached
         
         seed = self.get_deterministic_seed(original_value)
-        temp_faker = Faker()
-        temp_faker.seed_instance(seed)
+        temp_faker = self.get_seeded_faker(seed)
         
         masked_value = temp_faker.state()
-        self.mapping_cache[cache_key] = masked_value
+        self.mapping_cache.set('state', original_value, masked_value)
         return masked_value
     
     def mask_state_abbr(self, original_value: Any) -> str:
@@ -183,16 +264,15 @@ class DataMasker:
         if original_value is None:
             return None
         
-        cache_key = f"state_abbr_{original_value}"
-        if cache_key in self.mapping_cache:
-            return self.mapping_cache[cache_key]
+        cached = self.mapping_cache.get('state_abbr', original_value)
+        if cached is not None:
+            return cached
         
         seed = self.get_deterministic_seed(original_value)
-        temp_faker = Faker()
-        temp_faker.seed_instance(seed)
+        temp_faker = self.get_seeded_faker(seed)
         
         masked_value = temp_faker.state_abbr()
-        self.mapping_cache[cache_key] = masked_value
+        self.mapping_cache.set('state_abbr', original_value, masked_value)
         return masked_value
     
     def mask_country(self, original_value: Any) -> str:
@@ -200,16 +280,15 @@ class DataMasker:
         if original_value is None:
             return None
         
-        cache_key = f"country_{original_value}"
-        if cache_key in self.mapping_cache:
-            return self.mapping_cache[cache_key]
+        cached = self.mapping_cache.get('country', original_value)
+        if cached is not None:
+            return cached
         
         seed = self.get_deterministic_seed(original_value)
-        temp_faker = Faker()
-        temp_faker.seed_instance(seed)
+        temp_faker = self.get_seeded_faker(seed)
         
         masked_value = temp_faker.country()
-        self.mapping_cache[cache_key] = masked_value
+        self.mapping_cache.set('country', original_value, masked_value)
         return masked_value
     
     def mask_zip_code(self, original_value: Any) -> str:
@@ -217,16 +296,15 @@ class DataMasker:
         if original_value is None:
             return None
         
-        cache_key = f"zip_code_{original_value}"
-        if cache_key in self.mapping_cache:
-            return self.mapping_cache[cache_key]
+        cached = self.mapping_cache.get('zip_code', original_value)
+        if cached is not None:
+            return cached
         
         seed = self.get_deterministic_seed(original_value)
-        temp_faker = Faker()
-        temp_faker.seed_instance(seed)
+        temp_faker = self.get_seeded_faker(seed)
         
         masked_value = temp_faker.zipcode()
-        self.mapping_cache[cache_key] = masked_value
+        self.mapping_cache.set('zip_code', original_value, masked_value)
         return masked_value
     
     def mask_postal_code(self, original_value: Any) -> str:
@@ -234,16 +312,15 @@ class DataMasker:
         if original_value is None:
             return None
         
-        cache_key = f"postal_code_{original_value}"
-        if cache_key in self.mapping_cache:
-            return self.mapping_cache[cache_key]
+        cached = self.mapping_cache.get('postal_code', original_value)
+        if cached is not None:
+            return cached
         
         seed = self.get_deterministic_seed(original_value)
-        temp_faker = Faker()
-        temp_faker.seed_instance(seed)
+        temp_faker = self.get_seeded_faker(seed)
         
         masked_value = temp_faker.postcode()
-        self.mapping_cache[cache_key] = masked_value
+        self.mapping_cache.set('postal_code', original_value, masked_value)
         return masked_value
     
     def mask_po_box(self, original_value: Any) -> str:
@@ -251,15 +328,15 @@ class DataMasker:
         if original_value is None:
             return None
         
-        cache_key = f"po_box_{original_value}"
-        if cache_key in self.mapping_cache:
-            return self.mapping_cache[cache_key]
+        cached = self.mapping_cache.get('po_box', original_value)
+        if cached is not None:
+            return cached
         
         seed = self.get_deterministic_seed(original_value)
-        random.seed(seed)
+        rng = self.get_seeded_random(seed)
         
-        masked_value = f"PO Box {random.randint(1000, 99999)}"
-        self.mapping_cache[cache_key] = masked_value
+        masked_value = f"PO Box {rng.randint(1000, 99999)}"
+        self.mapping_cache.set('po_box', original_value, masked_value)
         return masked_value
     
     def mask_gps_coordinates(self, original_value: Any) -> str:
@@ -267,18 +344,17 @@ class DataMasker:
         if original_value is None:
             return None
         
-        cache_key = f"gps_{original_value}"
-        if cache_key in self.mapping_cache:
-            return self.mapping_cache[cache_key]
+        cached = self.mapping_cache.get('gps', original_value)
+        if cached is not None:
+            return cached
         
         seed = self.get_deterministic_seed(original_value)
-        temp_faker = Faker()
-        temp_faker.seed_instance(seed)
+        temp_faker = self.get_seeded_faker(seed)
         
         lat = temp_faker.latitude()
         lon = temp_faker.longitude()
         masked_value = f"{lat}, {lon}"
-        self.mapping_cache[cache_key] = masked_value
+        self.mapping_cache.set('gps', original_value, masked_value)
         return masked_value
     
     def mask_card_number(self, original_value: Any) -> str:
@@ -312,13 +388,13 @@ class DataMasker:
         if original_value is None:
             return None
         
-        cache_key = f"id_{original_value}"
-        if cache_key in self.mapping_cache:
-            return self.mapping_cache[cache_key]
+        cached = self.mapping_cache.get('id', original_value)
+        if cached is not None:
+            return cached
         
         # Generate deterministic but different ID
         seed = self.get_deterministic_seed(original_value)
-        random.seed(seed)
+        rng = self.get_seeded_random(seed)
         
         original_str = str(original_value)
         
@@ -327,11 +403,11 @@ class DataMasker:
             # Handle numeric IDs
             original_int = int(original_str)
             if original_int < 1000:
-                masked_value = random.randint(10000, 99999)
+                masked_value = rng.randint(10000, 99999)
             elif original_int < 10000:
-                masked_value = random.randint(100000, 999999)
+                masked_value = rng.randint(100000, 999999)
             else:
-                masked_value = random.randint(original_int * 2, original_int * 5)
+                masked_value = rng.randint(original_int * 2, original_int * 5)
         else:
             # Handle alphanumeric IDs (like CUST_83768938)
             # Extract prefix and numeric parts
@@ -344,8 +420,7 @@ class DataMasker:
             for part in parts:
                 if part.isalpha():
                     # Keep alphabetic parts but potentially change them
-                    temp_faker = Faker()
-                    temp_faker.seed_instance(seed + len(part))
+                    temp_faker = self.get_seeded_faker(seed + len(part))
                     # Generate similar length alphabetic string
                     if len(part) <= 4:
                         masked_part = temp_faker.lexify('?' * len(part)).upper()
@@ -356,13 +431,13 @@ class DataMasker:
                     # Mask numeric parts
                     original_num = int(part)
                     if original_num < 1000:
-                        masked_num = random.randint(10000, 99999)
+                        masked_num = rng.randint(10000, 99999)
                     else:
                         # Generate number with similar length
                         num_digits = len(part)
                         min_val = 10 ** (num_digits - 1)
                         max_val = (10 ** num_digits) - 1
-                        masked_num = random.randint(min_val, max_val)
+                        masked_num = rng.randint(min_val, max_val)
                     masked_parts.append(str(masked_num))
                 else:
                     # Keep separators and special characters
@@ -394,7 +469,7 @@ class DataMasker:
                 # No separators, just concatenate
                 masked_value = ''.join(masked_parts)
         
-        self.mapping_cache[cache_key] = masked_value
+        self.mapping_cache.set('id', original_value, masked_value)
         return masked_value
     
     def mask_username(self, original_value: Any) -> str:
@@ -402,16 +477,15 @@ class DataMasker:
         if original_value is None:
             return None
         
-        cache_key = f"username_{original_value}"
-        if cache_key in self.mapping_cache:
-            return self.mapping_cache[cache_key]
+        cached = self.mapping_cache.get('username', original_value)
+        if cached is not None:
+            return cached
         
         seed = self.get_deterministic_seed(original_value)
-        temp_faker = Faker()
-        temp_faker.seed_instance(seed)
+        temp_faker = self.get_seeded_faker(seed)
         
         masked_value = temp_faker.user_name()
-        self.mapping_cache[cache_key] = masked_value
+        self.mapping_cache.set('username', original_value, masked_value)
         return masked_value
     
     def mask_password(self, original_value: Any) -> str:
@@ -419,16 +493,15 @@ class DataMasker:
         if original_value is None:
             return None
         
-        cache_key = f"password_{original_value}"
-        if cache_key in self.mapping_cache:
-            return self.mapping_cache[cache_key]
+        cached = self.mapping_cache.get('password', original_value)
+        if cached is not None:
+            return cached
         
         seed = self.get_deterministic_seed(original_value)
-        temp_faker = Faker()
-        temp_faker.seed_instance(seed)
+        temp_faker = self.get_seeded_faker(seed)
         
         masked_value = temp_faker.password(length=12, special_chars=True, digits=True, upper_case=True, lower_case=True)
-        self.mapping_cache[cache_key] = masked_value
+        self.mapping_cache.set('password', original_value, masked_value)
         return masked_value
     
     def mask_iban(self, original_value: Any) -> str:
@@ -436,16 +509,15 @@ class DataMasker:
         if original_value is None:
             return None
         
-        cache_key = f"iban_{original_value}"
-        if cache_key in self.mapping_cache:
-            return self.mapping_cache[cache_key]
+        cached = self.mapping_cache.get('iban', original_value)
+        if cached is not None:
+            return cached
         
         seed = self.get_deterministic_seed(original_value)
-        temp_faker = Faker()
-        temp_faker.seed_instance(seed)
+        temp_faker = self.get_seeded_faker(seed)
         
         masked_value = temp_faker.iban()
-        self.mapping_cache[cache_key] = masked_value
+        self.mapping_cache.set('iban', original_value, masked_value)
         return masked_value
     
     def mask_swift_code(self, original_value: Any) -> str:
@@ -453,13 +525,12 @@ class DataMasker:
         if original_value is None:
             return None
         
-        cache_key = f"swift_{original_value}"
-        if cache_key in self.mapping_cache:
-            return self.mapping_cache[cache_key]
+        cached = self.mapping_cache.get('swift', original_value)
+        if cached is not None:
+            return cached
         
         seed = self.get_deterministic_seed(original_value)
-        temp_faker = Faker()
-        temp_faker.seed_instance(seed)
+        temp_faker = self.get_seeded_faker(seed)
         
         # Generate fake SWIFT code (8 or 11 characters)
         bank_code = temp_faker.lexify('????').upper()
@@ -468,7 +539,7 @@ class DataMasker:
         branch_code = temp_faker.lexify('???').upper()
         
         masked_value = f"{bank_code}{country_code}{location_code}{branch_code}"
-        self.mapping_cache[cache_key] = masked_value
+        self.mapping_cache.set('swift', original_value, masked_value)
         return masked_value
     
     def mask_money_amount(self, original_value: Any) -> str:
@@ -476,29 +547,29 @@ class DataMasker:
         if original_value is None:
             return None
         
-        cache_key = f"money_{original_value}"
-        if cache_key in self.mapping_cache:
-            return self.mapping_cache[cache_key]
+        cached = self.mapping_cache.get('money', original_value)
+        if cached is not None:
+            return cached
         
         seed = self.get_deterministic_seed(original_value)
-        random.seed(seed)
+        rng = self.get_seeded_random(seed)
         
         # Try to preserve the scale of the original amount
         try:
             original_float = float(str(original_value).replace(',', '').replace('$', ''))
             if original_float < 100:
-                masked_amount = round(random.uniform(50, 500), 2)
+                masked_amount = round(rng.uniform(50, 500), 2)
             elif original_float < 1000:
-                masked_amount = round(random.uniform(500, 2000), 2)
+                masked_amount = round(rng.uniform(500, 2000), 2)
             elif original_float < 10000:
-                masked_amount = round(random.uniform(2000, 20000), 2)
+                masked_amount = round(rng.uniform(2000, 20000), 2)
             else:
-                masked_amount = round(random.uniform(original_float * 0.5, original_float * 1.5), 2)
+                masked_amount = round(rng.uniform(original_float * 0.5, original_float * 1.5), 2)
         except:
-            masked_amount = round(random.uniform(100, 10000), 2)
+            masked_amount = round(rng.uniform(100, 10000), 2)
         
         masked_value = f"${masked_amount:,.2f}"
-        self.mapping_cache[cache_key] = masked_value
+        self.mapping_cache.set('money', original_value, masked_value)
         return masked_value
     
     def mask_btc_address(self, original_value: Any) -> str:
@@ -506,28 +577,28 @@ class DataMasker:
         if original_value is None:
             return None
         
-        cache_key = f"btc_{original_value}"
-        if cache_key in self.mapping_cache:
-            return self.mapping_cache[cache_key]
+        cached = self.mapping_cache.get('btc', original_value)
+        if cached is not None:
+            return cached
         
         seed = self.get_deterministic_seed(original_value)
-        random.seed(seed)
+        rng = self.get_seeded_random(seed)
         
         # Generate fake Bitcoin address (starts with 1, 3, or bc1)
         prefixes = ['1', '3', 'bc1']
-        prefix = random.choice(prefixes)
+        prefix = rng.choice(prefixes)
         
         if prefix == 'bc1':
             # Bech32 format
             chars = '023456789acdefghjklmnpqrstuvwxyz'
-            length = random.randint(39, 59)
+            length = rng.randint(39, 59)
         else:
             # Base58 format
             chars = '123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz'
-            length = random.randint(26, 35)
+            length = rng.randint(26, 35)
         
-        address = prefix + ''.join(random.choice(chars) for _ in range(length))
-        self.mapping_cache[cache_key] = address
+        address = prefix + ''.join(rng.choice(chars) for _ in range(length))
+        self.mapping_cache.set('btc', original_value, address)
         return address
     
     def mask_passport_number(self, original_value: Any) -> str:
@@ -535,19 +606,19 @@ class DataMasker:
         if original_value is None:
             return None
         
-        cache_key = f"passport_{original_value}"
-        if cache_key in self.mapping_cache:
-            return self.mapping_cache[cache_key]
+        cached = self.mapping_cache.get('passport', original_value)
+        if cached is not None:
+            return cached
         
         seed = self.get_deterministic_seed(original_value)
-        random.seed(seed)
+        rng = self.get_seeded_random(seed)
         
         # Generate fake passport number (varies by country, using generic format)
-        letters = ''.join(random.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ') for _ in range(2))
-        numbers = ''.join(random.choice('0123456789') for _ in range(7))
+        letters = ''.join(rng.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ') for _ in range(2))
+        numbers = ''.join(rng.choice('0123456789') for _ in range(7))
         masked_value = f"{letters}{numbers}"
         
-        self.mapping_cache[cache_key] = masked_value
+        self.mapping_cache.set('passport', original_value, masked_value)
         return masked_value
     
     def mask_drivers_license(self, original_value: Any) -> str:
@@ -555,17 +626,16 @@ class DataMasker:
         if original_value is None:
             return None
         
-        cache_key = f"drivers_license_{original_value}"
-        if cache_key in self.mapping_cache:
-            return self.mapping_cache[cache_key]
+        cached = self.mapping_cache.get('drivers_license', original_value)
+        if cached is not None:
+            return cached
         
         seed = self.get_deterministic_seed(original_value)
-        temp_faker = Faker()
-        temp_faker.seed_instance(seed)
+        temp_faker = self.get_seeded_faker(seed)
         
         # Generate fake driver's license (generic format)
         masked_value = temp_faker.lexify('?????????')
-        self.mapping_cache[cache_key] = masked_value.upper()
+        self.mapping_cache.set('drivers_license', original_value, masked_value.upper())
         return masked_value.upper()
     
     def mask_birth_date(self, original_value: Any) -> str:
@@ -573,20 +643,19 @@ class DataMasker:
         if original_value is None:
             return None
         
-        cache_key = f"birth_date_{original_value}"
-        if cache_key in self.mapping_cache:
-            return self.mapping_cache[cache_key]
+        cached = self.mapping_cache.get('birth_date', original_value)
+        if cached is not None:
+            return cached
         
         seed = self.get_deterministic_seed(original_value)
-        temp_faker = Faker()
-        temp_faker.seed_instance(seed)
+        temp_faker = self.get_seeded_faker(seed)
         
         # Generate birth date (18-80 years ago)
         end_date = datetime.now() - timedelta(days=18*365)
         start_date = datetime.now() - timedelta(days=80*365)
         
         masked_date = temp_faker.date_between(start_date=start_date, end_date=end_date)
-        self.mapping_cache[cache_key] = str(masked_date)
+        self.mapping_cache.set('birth_date', original_value, str(masked_date))
         return str(masked_date)
     
     def mask_gender(self, original_value: Any) -> str:
@@ -594,17 +663,17 @@ class DataMasker:
         if original_value is None:
             return None
         
-        cache_key = f"gender_{original_value}"
-        if cache_key in self.mapping_cache:
-            return self.mapping_cache[cache_key]
+        cached = self.mapping_cache.get('gender', original_value)
+        if cached is not None:
+            return cached
         
         seed = self.get_deterministic_seed(original_value)
-        random.seed(seed)
+        rng = self.get_seeded_random(seed)
         
         genders = ['Male', 'Female', 'Other', 'Prefer not to say']
-        masked_value = random.choice(genders)
+        masked_value = rng.choice(genders)
         
-        self.mapping_cache[cache_key] = masked_value
+        self.mapping_cache.set('gender', original_value, masked_value)
         return masked_value
     
     def mask_marital_status(self, original_value: Any) -> str:
@@ -612,17 +681,17 @@ class DataMasker:
         if original_value is None:
             return None
         
-        cache_key = f"marital_{original_value}"
-        if cache_key in self.mapping_cache:
-            return self.mapping_cache[cache_key]
+        cached = self.mapping_cache.get('marital', original_value)
+        if cached is not None:
+            return cached
         
         seed = self.get_deterministic_seed(original_value)
-        random.seed(seed)
+        rng = self.get_seeded_random(seed)
         
         statuses = ['Single', 'Married', 'Divorced', 'Widowed', 'Separated']
-        masked_value = random.choice(statuses)
+        masked_value = rng.choice(statuses)
         
-        self.mapping_cache[cache_key] = masked_value
+        self.mapping_cache.set('marital', original_value, masked_value)
         return masked_value
     
     def mask_account_number(self, original_value: Any) -> str:
@@ -630,29 +699,29 @@ class DataMasker:
         if original_value is None:
             return None
         
-        cache_key = f"account_{original_value}"
-        if cache_key in self.mapping_cache:
-            return self.mapping_cache[cache_key]
+        cached = self.mapping_cache.get('account', original_value)
+        if cached is not None:
+            return cached
         
         seed = self.get_deterministic_seed(original_value)
-        random.seed(seed)
+        rng = self.get_seeded_random(seed)
         
         # Generate account number with similar length
         original_str = str(original_value)
         if original_str.isdigit():
             length = len(original_str)
-            masked_value = ''.join(random.choice('0123456789') for _ in range(length))
+            masked_value = ''.join(rng.choice('0123456789') for _ in range(length))
         else:
             # Keep format but change values
             masked_value = ''.join(
-                random.choice('0123456789') if c.isdigit() 
-                else random.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ') if c.isupper()
-                else random.choice('abcdefghijklmnopqrstuvwxyz') if c.islower()
+                rng.choice('0123456789') if c.isdigit() 
+                else rng.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ') if c.isupper()
+                else rng.choice('abcdefghijklmnopqrstuvwxyz') if c.islower()
                 else c
                 for c in original_str
             )
         
-        self.mapping_cache[cache_key] = masked_value
+        self.mapping_cache.set('account', original_value, masked_value)
         return masked_value
     
     def mask_ip_address(self, original_value: Any) -> str:
@@ -660,13 +729,12 @@ class DataMasker:
         if original_value is None:
             return None
         
-        cache_key = f"ip_{original_value}"
-        if cache_key in self.mapping_cache:
-            return self.mapping_cache[cache_key]
+        cached = self.mapping_cache.get('ip', original_value)
+        if cached is not None:
+            return cached
         
         seed = self.get_deterministic_seed(original_value)
-        temp_faker = Faker()
-        temp_faker.seed_instance(seed)
+        temp_faker = self.get_seeded_faker(seed)
         
         # Detect if IPv4 or IPv6
         try:
@@ -679,7 +747,7 @@ class DataMasker:
             # Default to IPv4 if cannot parse
             masked_value = temp_faker.ipv4()
         
-        self.mapping_cache[cache_key] = masked_value
+        self.mapping_cache.set('ip', original_value, masked_value)
         return masked_value
     
     def mask_mac_address(self, original_value: Any) -> str:
@@ -687,16 +755,16 @@ class DataMasker:
         if original_value is None:
             return None
         
-        cache_key = f"mac_{original_value}"
-        if cache_key in self.mapping_cache:
-            return self.mapping_cache[cache_key]
+        cached = self.mapping_cache.get('mac', original_value)
+        if cached is not None:
+            return cached
         
         seed = self.get_deterministic_seed(original_value)
-        random.seed(seed)
+        rng = self.get_seeded_random(seed)
         
         # Generate fake MAC address
-        mac = ':'.join(['%02x' % random.randint(0, 255) for _ in range(6)])
-        self.mapping_cache[cache_key] = mac
+        mac = ':'.join(['%02x' % rng.randint(0, 255) for _ in range(6)])
+        self.mapping_cache.set('mac', original_value, mac)
         return mac
     
     def mask_url(self, original_value: Any) -> str:
@@ -704,16 +772,15 @@ class DataMasker:
         if original_value is None:
             return None
         
-        cache_key = f"url_{original_value}"
-        if cache_key in self.mapping_cache:
-            return self.mapping_cache[cache_key]
+        cached = self.mapping_cache.get('url', original_value)
+        if cached is not None:
+            return cached
         
         seed = self.get_deterministic_seed(original_value)
-        temp_faker = Faker()
-        temp_faker.seed_instance(seed)
+        temp_faker = self.get_seeded_faker(seed)
         
         masked_value = temp_faker.url()
-        self.mapping_cache[cache_key] = masked_value
+        self.mapping_cache.set('url', original_value, masked_value)
         return masked_value
     
     def mask_vin(self, original_value: Any) -> str:
@@ -721,18 +788,18 @@ class DataMasker:
         if original_value is None:
             return None
         
-        cache_key = f"vin_{original_value}"
-        if cache_key in self.mapping_cache:
-            return self.mapping_cache[cache_key]
+        cached = self.mapping_cache.get('vin', original_value)
+        if cached is not None:
+            return cached
         
         seed = self.get_deterministic_seed(original_value)
-        random.seed(seed)
+        rng = self.get_seeded_random(seed)
         
         # Generate fake 17-character VIN
         chars = '0123456789ABCDEFGHJKLMNPRSTUVWXYZ'  # No I, O, Q
-        vin = ''.join(random.choice(chars) for _ in range(17))
+        vin = ''.join(rng.choice(chars) for _ in range(17))
         
-        self.mapping_cache[cache_key] = vin
+        self.mapping_cache.set('vin', original_value, vin)
         return vin
     
     def mask_license_plate(self, original_value: Any) -> str:
@@ -740,17 +807,16 @@ class DataMasker:
         if original_value is None:
             return None
         
-        cache_key = f"license_plate_{original_value}"
-        if cache_key in self.mapping_cache:
-            return self.mapping_cache[cache_key]
+        cached = self.mapping_cache.get('license_plate', original_value)
+        if cached is not None:
+            return cached
         
         seed = self.get_deterministic_seed(original_value)
-        temp_faker = Faker()
-        temp_faker.seed_instance(seed)
+        temp_faker = self.get_seeded_faker(seed)
         
         # Generate fake license plate
         masked_value = temp_faker.license_plate()
-        self.mapping_cache[cache_key] = masked_value
+        self.mapping_cache.set('license_plate', original_value, masked_value)
         return masked_value
     
     def mask_medical_record_number(self, original_value: Any) -> str:
@@ -758,16 +824,16 @@ class DataMasker:
         if original_value is None:
             return None
         
-        cache_key = f"mrn_{original_value}"
-        if cache_key in self.mapping_cache:
-            return self.mapping_cache[cache_key]
+        cached = self.mapping_cache.get('mrn', original_value)
+        if cached is not None:
+            return cached
         
         seed = self.get_deterministic_seed(original_value)
-        random.seed(seed)
+        rng = self.get_seeded_random(seed)
         
         # Generate fake medical record number
-        masked_value = f"MRN{random.randint(100000, 999999)}"
-        self.mapping_cache[cache_key] = masked_value
+        masked_value = f"MRN{rng.randint(100000, 999999)}"
+        self.mapping_cache.set('mrn', original_value, masked_value)
         return masked_value
     
     def mask_icd_code(self, original_value: Any) -> str:
@@ -775,24 +841,24 @@ class DataMasker:
         if original_value is None:
             return None
         
-        cache_key = f"icd_{original_value}"
-        if cache_key in self.mapping_cache:
-            return self.mapping_cache[cache_key]
+        cached = self.mapping_cache.get('icd', original_value)
+        if cached is not None:
+            return cached
         
         seed = self.get_deterministic_seed(original_value)
-        random.seed(seed)
+        rng = self.get_seeded_random(seed)
         
         # Generate fake ICD code
         if '.' in str(original_value):
             # ICD-10 format (A00.0)
-            letter = random.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ')
-            numbers = f"{random.randint(0, 99):02d}.{random.randint(0, 9)}"
+            letter = rng.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ')
+            numbers = f"{rng.randint(0, 99):02d}.{rng.randint(0, 9)}"
             masked_value = f"{letter}{numbers}"
         else:
             # ICD-9 format (123.45)
-            masked_value = f"{random.randint(100, 999)}.{random.randint(0, 99):02d}"
+            masked_value = f"{rng.randint(100, 999)}.{rng.randint(0, 99):02d}"
         
-        self.mapping_cache[cache_key] = masked_value
+        self.mapping_cache.set('icd', original_value, masked_value)
         return masked_value
     
     def mask_generic_text(self, original_value: Any) -> str:
@@ -800,16 +866,15 @@ class DataMasker:
         if original_value is None:
             return None
         
-        cache_key = f"text_{original_value}"
-        if cache_key in self.mapping_cache:
-            return self.mapping_cache[cache_key]
+        cached = self.mapping_cache.get('text', original_value)
+        if cached is not None:
+            return cached
         
         seed = self.get_deterministic_seed(original_value)
-        temp_faker = Faker()
-        temp_faker.seed_instance(seed)
+        temp_faker = self.get_seeded_faker(seed)
         
         masked_value = temp_faker.text(max_nb_chars=len(str(original_value)))
-        self.mapping_cache[cache_key] = masked_value
+        self.mapping_cache.set('text', original_value, masked_value)
         return masked_value
     
     def mask_numeric(self, original_value: Any) -> Any:
@@ -820,193 +885,196 @@ class DataMasker:
         try:
             num_value = float(original_value)
             seed = self.get_deterministic_seed(original_value)
-            random.seed(seed)
+            rng = self.get_seeded_random(seed)
             
             # Generate number in similar range
             if num_value == 0:
                 return 0
             elif abs(num_value) < 100:
-                return round(random.uniform(100, 999), 2)
+                return round(rng.uniform(100, 999), 2)
             else:
                 # Multiply by random factor between 1.5 and 3
-                factor = random.uniform(1.5, 3.0)
+                factor = rng.uniform(1.5, 3.0)
                 return round(num_value * factor, 2)
         except:
             return original_value
     
-    def apply_masking(self, data: List[Dict[str, Any]], masking_config: Dict[str, str]) -> List[Dict[str, Any]]:
-        """Apply masking to dataset based on configuration"""
-        masked_data = []
+    # Registry of masking type -> (masker function, description), in UI display order
+    MASKING_TYPES: Dict[str, Tuple[Optional[Callable[..., Any]], str]] = {
+        "none": (None, "No masking applied"),
+        
+        # Names
+        "first_name": (mask_first_name, "Replace with fake first names"),
+        "last_name": (mask_last_name, "Replace with fake last names"),
+        "full_name": (mask_full_name, "Replace with fake full names"),
+        "organization": (mask_organization, "Replace with fake organization names"),
+        
+        # Location
+        "street_address": (mask_street_address, "Replace with fake street addresses"),
+        "city": (mask_city, "Replace with fake city names"),
+        "state": (mask_state, "Replace with fake state names"),
+        "state_abbr": (mask_state_abbr, "Replace with fake state abbreviations"),
+        "country": (mask_country, "Replace with fake country names"),
+        "zip_code": (mask_zip_code, "Replace with fake ZIP codes"),
+        "postal_code": (mask_postal_code, "Replace with fake postal codes"),
+        "po_box": (mask_po_box, "Replace with fake PO Box numbers"),
+        "gps_coordinates": (mask_gps_coordinates, "Replace with fake GPS coordinates"),
+        
+        # Contact Information
+        "email": (mask_email, "Replace with fake email addresses"),
+        "phone": (mask_phone, "Replace with fake phone numbers"),
+        
+        # User Credentials
+        "username": (mask_username, "Replace with fake usernames"),
+        "password": (mask_password, "Replace with fake passwords"),
+        
+        # Financial Information
+        "card_number": (mask_card_number, "Mask all but last 4 digits of credit cards"),
+        "iban": (mask_iban, "Replace with fake IBAN numbers"),
+        "swift_code": (mask_swift_code, "Replace with fake SWIFT codes"),
+        "money_amount": (mask_money_amount, "Replace with fake money amounts"),
+        "btc_address": (mask_btc_address, "Replace with fake Bitcoin addresses"),
+        
+        # Identification
+        "ssn": (mask_ssn, "Mask all but last 4 digits of SSN"),
+        "passport_number": (mask_passport_number, "Replace with fake passport numbers"),
+        "drivers_license": (mask_drivers_license, "Replace with fake driver's license numbers"),
+        "birth_date": (mask_birth_date, "Replace with fake birth dates"),
+        "gender": (mask_gender, "Replace with fake gender values"),
+        # Other Personal Information
+        "marital_status": (mask_marital_status, "Replace with fake marital status"),
+        
+        # Accounts and Licenses
+        "account_number": (mask_account_number, "Replace with fake account numbers"),
+        "id": (mask_id, "Replace with different ID maintaining referential integrity"),
+        
+        # Network and Web Location
+        "ip_address": (mask_ip_address, "Replace with fake IP addresses"),
+        "mac_address": (mask_mac_address, "Replace with fake MAC addresses"),
+        "url": (mask_url, "Replace with fake URLs"),
+        
+        # Vehicle Information
+        "vin": (mask_vin, "Replace with fake Vehicle Identification Numbers"),
+        "license_plate": (mask_license_plate, "Replace with fake license plate numbers"),
+        
+        # Medical Information
+        "medical_record_number": (mask_medical_record_number, "Replace with fake medical record numbers"),
+        "icd_code": (mask_icd_code, "Replace with fake ICD-9/ICD-10 codes"),
+        
+        # Generic
+        "text": (mask_generic_text, "Replace with fake text"),
+        "numeric": (mask_numeric, "Replace with different numeric values")
+    }
+    
+    @classmethod
+    def register_masking_type(cls, masking_type: str, masker: Callable[..., Any], description: str):
+        """Register a masking type; masker is called as masker(data_masker, value)"""
+        cls.MASKING_TYPES[masking_type] = (masker, description)
+    
+    def compile_masking_plan(self, masking_config: Dict[str, str]) -> List[Tuple[str, str, Callable[[Any], Any]]]:
+        """Resolve a masking config into (column, masking type, bound masker), skipping passthrough columns"""
+        plan = []
+        for column, masking_type in masking_config.items():
+            masker = self.MASKING_TYPES.get(masking_type, (None, None))[0]
+            if masker is not None:
+                plan.append((column, masking_type, MethodType(masker, self)))
+        return plan
+    
+    def mask_values(self, mask: Callable[[Any], Any], values: List[Any], masking_type: str = None) -> List[Any]:
+        """Mask a column of values, calling the masker once per distinct value"""
+        started = time.perf_counter() if metrics.ENABLED and masking_type else None
+        # Maskers depend on the value's type and string form, so 1, 1.0 and True stay distinct
+        keys = [(type(value), str(value)) for value in values]
+        distinct = dict(zip(keys, values))
+        
+        if self.token_vault is not None and masking_type is not None:
+            masked_by_key = self._mask_with_vault(mask, distinct, masking_type)
+        else:
+            masked_by_key = {key: mask(value) for key, value in distinct.items()}
         
-        for row in data:
-            masked_row = {}
-            for column, value in row.items():
-                masking_type = masking_config.get(column, 'none')
-                
-                if masking_type == 'none':
-                    masked_row[column] = value
-                # Names
-                elif masking_type == 'first_name':
-                    masked_row[column] = self.mask_first_name(value)
-                elif masking_type == 'last_name':
-                    masked_row[column] = self.mask_last_name(value)
-                elif masking_type == 'full_name':
-                    masked_row[column] = self.mask_full_name(value)
-                elif masking_type == 'organization':
-                    masked_row[column] = self.mask_organization(value)
-                # Contact
-                elif masking_type == 'email':
-                    masked_row[column] = self.mask_email(value)
-                elif masking_type == 'phone':
-                    masked_row[column] = self.mask_phone(value)
-                # Location
-                elif masking_type == 'street_address':
-                    masked_row[column] = self.mask_street_address(value)
-                elif masking_type == 'city':
-                    masked_row[column] = self.mask_city(value)
-                elif masking_type == 'state':
-                    masked_row[column] = self.mask_state(value)
-                elif masking_type == 'state_abbr':
-                    masked_row[column] = self.mask_state_abbr(value)
-                elif masking_type == 'country':
-                    masked_row[column] = self.mask_country(value)
-                elif masking_type == 'zip_code':
-                    masked_row[column] = self.mask_zip_code(value)
-                elif masking_type == 'postal_code':
-                    masked_row[column] = self.mask_postal_code(value)
-                elif masking_type == 'po_box':
-                    masked_row[column] = self.mask_po_box(value)
-                elif masking_type == 'gps_coordinates':
-                    masked_row[column] = self.mask_gps_coordinates(value)
-                # Financial
-                elif masking_type == 'card_number':
-                    masked_row[column] = self.mask_card_number(value)
-                elif masking_type == 'iban':
-                    masked_row[column] = self.mask_iban(value)
-                elif masking_type == 'swift_code':
-                    masked_row[column] = self.mask_swift_code(value)
-                elif masking_type == 'money_amount':
-                    masked_row[column] = self.mask_money_amount(value)
-                elif masking_type == 'btc_address':
-                    masked_row[column] = self.mask_btc_address(value)
-                # Credentials
-                elif masking_type == 'username':
-                    masked_row[column] = self.mask_username(value)
-                elif masking_type == 'password':
-                    masked_row[column] = self.mask_password(value)
-                # Identification
-                elif masking_type == 'ssn':
-                    masked_row[column] = self.mask_ssn(value)
-                elif masking_type == 'passport_number':
-                    masked_row[column] = self.mask_passport_number(value)
-                elif masking_type == 'drivers_license':
-                    masked_row[column] = self.mask_drivers_license(value)
-                elif masking_type == 'birth_date':
-                    masked_row[column] = self.mask_birth_date(value)
-                elif masking_type == 'gender':
-                    masked_row[column] = self.mask_gender(value)
-                elif masking_type == 'id':
-                    masked_row[column] = self.mask_id(value)
-                # Personal
-                elif masking_type == 'marital_status':
-                    masked_row[column] = self.mask_marital_status(value)
-                # Accounts
-                elif masking_type == 'account_number':
-                    masked_row[column] = self.mask_account_number(value)
-                # Network
-                elif masking_type == 'ip_address':
-                    masked_row[column] = self.mask_ip_address(value)
-                elif masking_type == 'mac_address':
-                    masked_row[column] = self.mask_mac_address(value)
-                elif masking_type == 'url':
-                    masked_row[column] = self.mask_url(value)
-                # Vehicle
-                elif masking_type == 'vin':
-                    masked_row[column] = self.mask_vin(value)
-                elif masking_type == 'license_plate':
-                    masked_row[column] = self.mask_license_plate(value)
-                # Medical
-                elif masking_type == 'medical_record_number':
-                    masked_row[column] = self.mask_medical_record_number(value)
-                elif masking_type == 'icd_code':
-                    masked_row[column] = self.mask_icd_code(value)
-                # Generic
-                elif masking_type == 'text':
-                    masked_row[column] = self.mask_generic_text(value)
-                elif masking_type == 'numeric':
-                    masked_row[column] = self.mask_numeric(value)
-                else:
-                    masked_row[column] = value
-            
-            masked_data.append(masked_row)
+        masked = [masked_by_key[key] for key in keys]
+        if started is not None:
+            metrics.MASKED_VALUES.inc(len(values), masking_type=masking_type)
+            metrics.MASKING_SECONDS.inc(time.perf_counter() - started, masking_type=masking_type)
+        return masked
+    
+    def _mask_with_vault(self, mask: Callable[[Any], Any], distinct: Dict[tuple, Any], masking_type: str) -> Dict[tuple, Any]:
+        """Mask distinct values, reusing and extending the persistent token vault"""
+        digests = {key: self.token_vault.digest(value) for key, value in distinct.items() if value is not None}
+        stored = self.token_vault.get_many(masking_type, list(digests.values()))
+        
+        masked_by_key = {}
+        new_tokens = []
+        for key, value in distinct.items():
+            digest = digests.get(key)
+            if digest in stored:
+                masked_by_key[key] = stored[digest]
+                continue
+            masked = masked_by_key[key] = mask(value)
+            if digest is not None and isinstance(masked, (str, int, float)):
+                new_tokens.append((digest, masked))
+        
+        self.token_vault.put_many(masking_type, new_tokens)
+        return masked_by_key
+    
+    def mask_column(self, masking_type: str, values: List[Any]) -> List[Any]:
+        """Mask a whole column of values with one masking type"""
+        masker = self.MASKING_TYPES.get(masking_type, (None, None))[0]
+        if masker is None:
+            return list(values)
+        return self.mask_values(MethodType(masker, self), values, masking_type)
+    
+    def apply_masking_plan(self, data: List[Dict[str, Any]], plan: List[Tuple[str, str, Callable[[Any], Any]]],
+                           profile: MaskingProfile = None) -> List[Dict[str, Any]]:
+        """Apply a compiled masking plan to a dataset, one column at a time"""
+        masked_data = [dict(row) for row in data]
+        if not masked_data:
+            return masked_data
+        
+        for column, masking_type, mask in plan:
+            if column not in masked_data[0]:
+                continue
+            values = [row[column] for row in masked_data]
+            if profile is None:
+                masked_values = self.mask_values(mask, values, masking_type)
+            else:
+                masked_values = self._profiled_mask_values(profile, column, masking_type, mask, values)
+            for masked_row, masked_value in zip(masked_data, masked_values):
+                masked_row[column] = masked_value
         
         return masked_data
     
+    def _profiled_mask_values(self, profile: MaskingProfile, column: str, masking_type: str,
+                              mask: Callable[[Any], Any], values: List[Any]) -> List[Any]:
+        calls = 0
+        
+        def counted_mask(value):
+            nonlocal calls
+            calls += 1
+            return mask(value)
+        
+        hits = self.mapping_cache.hit_count()
+        started = time.perf_counter()
+        masked_values = self.mask_values(counted_mask, values, masking_type)
+        profile.record(column, masking_type, time.perf_counter() - started, len(values), calls,
+                       self.mapping_cache.hit_count() - hits)
+        return masked_values
+    
+    def apply_masking(self, data: List[Dict[str, Any]], masking_config: Dict[str, str],
+                      profile: MaskingProfile = None) -> List[Dict[str, Any]]:
+        """Apply masking to dataset based on configuration, recording timings into profile if given"""
+        return self.apply_masking_plan(data, self.compile_masking_plan(masking_config), profile)
+    
+    def iter_masking(self, chunks: Iterable[List[Dict[str, Any]]], masking_config: Dict[str, str],
+                     profile: MaskingProfile = None) -> Iterator[List[Dict[str, Any]]]:
+        """Lazily apply masking to a stream of row chunks"""
+        plan = self.compile_masking_plan(masking_config)
+        for chunk in chunks:
+            yield self.apply_masking_plan(chunk, plan, profile)
+    
     def get_available_masking_types(self) -> List[Dict[str, str]]:
         """Get list of available masking types"""
         return [
-            {"type": "none", "description": "No masking applied"},
-            
-            # Names
-            {"type": "first_name", "description": "Replace with fake first names"},
-            {"type": "last_name", "description": "Replace with fake last names"},
-            {"type": "full_name", "description": "Replace with fake full names"},
-            {"type": "organization", "description": "Replace with fake organization names"},
-            
-            # Location
-            {"type": "street_address", "description": "Replace with fake street addresses"},
-            {"type": "city", "description": "Replace with fake city names"},
-            {"type": "state", "description": "Replace with fake state names"},
-            {"type": "state_abbr", "description": "Replace with fake state abbreviations"},
-            {"type": "country", "description": "Replace with fake country names"},
-            {"type": "zip_code", "description": "Replace with fake ZIP codes"},
-            {"type": "postal_code", "description": "Replace with fake postal codes"},
-            {"type": "po_box", "description": "Replace with fake PO Box numbers"},
-            {"type": "gps_coordinates", "description": "Replace with fake GPS coordinates"},
-            
-            # Contact Information
-            {"type": "email", "description": "Replace with fake email addresses"},
-            {"type": "phone", "description": "Replace with fake phone numbers"},
-            
-            # User Credentials
-            {"type": "username", "description": "Replace with fake usernames"},
-            {"type": "password", "description": "Replace with fake passwords"},
-            
-            # Financial Information
-            {"type": "card_number", "description": "Mask all but last 4 digits of credit cards"},
-            {"type": "iban", "description": "Replace with fake IBAN numbers"},
-            {"type": "swift_code", "description": "Replace with fake SWIFT codes"},
-            {"type": "money_amount", "description": "Replace with fake money amounts"},
-            {"type": "btc_address", "description": "Replace with fake Bitcoin addresses"},
-            
-            # Identification
-            {"type": "ssn", "description": "Mask all but last 4 digits of SSN"},
-            {"type": "passport_number", "description": "Replace with fake passport numbers"},
-            {"type": "drivers_license", "description": "Replace with fake driver's license numbers"},
-            {"type": "birth_date", "description": "Replace with fake birth dates"},
-            {"type": "gender", "description": "Replace with fake gender values"},
-            
-            # Other Personal Information
-            {"type": "marital_status", "description": "Replace with fake marital status"},
-            
-            # Accounts and Licenses
-            {"type": "account_number", "description": "Replace with fake account numbers"},
-            {"type": "id", "description": "Replace with different ID maintaining referential integrity"},
-            
-            # Network and Web Location
-            {"type": "ip_address", "description": "Replace with fake IP addresses"},
-            {"type": "mac_address", "description": "Replace with fake MAC addresses"},
-            {"type": "url", "description": "Replace with fake URLs"},
-            
-            # Vehicle Information
-            {"type": "vin", "description": "Replace with fake Vehicle Identification Numbers"},
-            {"type": "license_plate", "description": "Replace with fake license plate numbers"},
-            
-            # Medical Information
-            {"type": "medical_record_number", "description": "Replace with fake medical record numbers"},
-            {"type": "icd_code", "description": "Replace with fake ICD-9/ICD-10 codes"},
-            
-            # Generic
-            {"type": "text", "description": "Replace with fake text"},
-            {"type": "numeric", "description": "Replace with different numeric values"}
+            {"type": masking_type, "description": description}
+            for masking_type, (_, description) in self.MASKING_TYPES.items()
         ]
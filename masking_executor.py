@@ -0,0 +1,63 @@
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List
+from config import Config
+from masking import DataMasker
+
+# Per-process masker, created by the pool initializer in each worker
+_worker_masker = None
+
+def _init_worker():
+    global _worker_masker
+    _worker_masker = DataMasker()
+
+def _mask_chunk(chunk: List[Dict[str, Any]], masking_config: Dict[str, str]) -> List[Dict[str, Any]]:
+    return _worker_masker.apply_masking(chunk, masking_config)
+
+class MaskingExecutor:
+    """Mask row chunks across a pool of worker processes, preserving chunk order.
+
+    Every masker derives its output from a seed computed per value, so a chunk
+    masks to the same rows in any worker. Workers are spawned rather than
+    forked: the pool starts from a ship thread while other threads may hold
+    locks (metrics, mapping cache, token vault) that a forked child would
+    inherit locked. Masking types added with DataMasker.register_masking_type
+    must therefore be registered at import time to be visible in the workers.
+    """
+
+    def __init__(self, workers: int = None):
+        self.workers = workers or Config.MASKING_WORKERS
+        self._pool = None
+
+    def __enter__(self):
+        if self.workers > 1:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                             mp_context=multiprocessing.get_context("spawn"))
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
+
+    def shutdown(self):
+        """Stop the worker processes, cancelling chunks not yet started"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    def map_chunks(self, chunks: Iterable[List[Dict[str, Any]]], masking_config: Dict[str, str],
+                   masker: DataMasker = None) -> Iterator[List[Dict[str, Any]]]:
+        """Mask a stream of chunks, yielding results in input order"""
+        if self._pool is None:
+            yield from (masker or DataMasker()).iter_masking(chunks, masking_config)
+            return
+
+        # Bound the chunks in flight so memory stays proportional to the worker count
+        max_pending = self.workers * 2
+        pending = deque()
+        for chunk in chunks:
+            pending.append(self._pool.submit(_mask_chunk, chunk, masking_config))
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
@@ -0,0 +1,46 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+from config import Config
+
+class MetadataCache:
+    """TTL cache for schema metadata, keyed by (kind, database, table)"""
+
+    def __init__(self, ttl: float = None):
+        self.ttl = ttl if ttl is not None else Config.METADATA_CACHE_TTL
+        self._entries: Dict[Tuple, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return None
+            return entry[1]
+
+    def set(self, key: Tuple, value: Any):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+
+    def get_or_load(self, key: Tuple, loader: Callable[[], Any]) -> Any:
+        value = self.get(key)
+        if value is None:
+            value = loader()
+            self.set(key, value)
+        return value
+
+    def invalidate(self, database_name: str = None, table_name: str = None):
+        """Drop everything, one database's entries, or one table's entries"""
+        with self._lock:
+            if database_name is None:
+                self._entries.clear()
+                return
+            for key in list(self._entries):
+                # The database list changes whenever any database is created or dropped
+                if key[0] == "databases" or (key[1] == database_name and (table_name is None or key[2] in (None, table_name))):
+                    del self._entries[key]
@@ -0,0 +1,134 @@
+import bisect
+import threading
+from typing import Dict, List, Tuple
+from config import Config
+
+# Checked first by every recording call so disabled metrics cost one attribute lookup
+ENABLED = Config.METRICS_ENABLED
+
+_registry: List["_Metric"] = []
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(labelnames: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple:
+        return tuple(labels.get(name, "") for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+class Counter(_Metric):
+    """Monotonic count, optionally split by labels"""
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        if not ENABLED:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {value}" for key, value in values]
+
+class Gauge(Counter):
+    """Point-in-time value, usually set just before rendering"""
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        if not ENABLED:
+            return
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+class Histogram(_Metric):
+    """Distribution of observed values over fixed upper bounds"""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Label values -> [per-bucket counts (last is +Inf), sum]
+        self._series: Dict[Tuple, list] = {}
+
+    def observe(self, value: float, **labels):
+        if not ENABLED:
+            return
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            series = [(key, list(counts), total) for key, (counts, total) in self._series.items()]
+        lines = []
+        for key, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{float(bound)!r}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format"""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+PHASE_SECONDS = Histogram(
+    "datamasker_phase_seconds", "Duration of one pass through a ship or preview phase", ("operation", "phase")
+)
+ROWS = Counter("datamasker_ship_rows_total", "Rows passing each ship stage", ("stage",))
+MASKED_VALUES = Counter("datamasker_masked_values_total", "Values masked, by masking type", ("masking_type",))
+MASKING_SECONDS = Counter("datamasker_masking_seconds_total", "Time spent masking, by masking type", ("masking_type",))
+FAKER_CONSTRUCTIONS = Counter("datamasker_faker_constructions_total", "Faker instances created", ("locale",))
+POOL_CHECKOUT_SECONDS = Histogram(
+    "datamasker_pool_checkout_seconds", "Time to obtain a pooled database connection, including waits",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30)
+)
+POOL_CHECKED_OUT = Gauge("datamasker_pool_checked_out", "Connections currently checked out", ("database",))
+POOL_CAPACITY = Gauge("datamasker_pool_capacity", "Pool size plus allowed overflow", ("database",))
+CACHE_HITS = Gauge("datamasker_mapping_cache_hits", "Shared mapping cache hits", ("namespace",))
+CACHE_MISSES = Gauge("datamasker_mapping_cache_misses", "Shared mapping cache misses", ("namespace",))
+CACHE_HIT_RATIO = Gauge("datamasker_mapping_cache_hit_ratio", "Shared mapping cache hit ratio")
+CACHE_ENTRIES = Gauge("datamasker_mapping_cache_entries", "Entries in the shared mapping cache")
+ACTIVE_JOBS = Gauge("datamasker_active_jobs", "Ship jobs queued or running")
@@ -1,5 +1,16 @@
-from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
+import re
+from pydantic import BaseModel, Field, field_validator, model_validator
+from typing import List, Dict, Any, Literal, Optional
+
+# String literals are blanked out before a row filter is checked for forbidden SQL
+_SQL_STRING = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.|\"\")*\"")
+# Statement separators, comments, subqueries and functions that read files or stall the server
+_FORBIDDEN_SQL = re.compile(
+    r";|--|#|/\*|\*/|\b(select|union|into|outfile|dumpfile|load_file|sleep|benchmark|get_lock)\b",
+    re.IGNORECASE
+)
+# Rows a sample or preview may return; random and stratified samples run one subquery per row
+MAX_SAMPLE_ROWS = 1000
 
 class DatabaseInfo(BaseModel):
     name: str
@@ -18,7 +29,7 @@ class ColumnInfo(BaseModel):
 class SampleDataRequest(BaseModel):
     database_name: str
     table_name: str
-    limit: int = 10
+    limit: int = Field(default=10, gt=0, le=MAX_SAMPLE_ROWS)
 
 class MaskingConfig(BaseModel):
     column_name: str
@@ -28,7 +39,11 @@ class PreviewRequest(BaseModel):
     database_name: str
     table_name: str
     masking_config: Dict[str, str]
-    limit: int = 10
+    limit: int = Field(default=10, gt=0, le=MAX_SAMPLE_ROWS)
+    # "first" rows, or rows at "random" / evenly "stratified" points of the primary key range
+    sampling: Literal["first", "random", "stratified"] = "first"
+    # Draw a new sample instead of reusing the one cached for this table
+    refresh_sample: bool = False
 
 class ShippingRequest(BaseModel):
     source_database: str
@@ -37,6 +52,89 @@ class ShippingRequest(BaseModel):
     target_table: str
     masking_config: Dict[str, str]
     create_table_if_not_exists: bool = True
+    chunk_size: Optional[int] = Field(default=None, gt=0)
+    # "shared" reuses the process-wide mapping cache, "job" uses one freed when the ship ends
+    cache_scope: Literal["shared", "job"] = "shared"
+    masking_workers: Optional[int] = Field(default=None, gt=0)
+    # Bulk write settings; unset values fall back to Config
+    insert_mode: Optional[Literal["insert", "load_data"]] = None
+    insert_batch_size: Optional[int] = Field(default=None, gt=0)
+    commit_interval: Optional[int] = Field(default=None, gt=0)
+    # Read in primary key order and checkpoint each committed chunk so the job can resume
+    resumable: bool = False
+    # How the target is cleared; unset falls back to Config.TARGET_REFRESH_STRATEGY
+    refresh_strategy: Optional[Literal["delete", "truncate", "swap"]] = None
+    # Pull only the primary key and masked columns; unmasked columns are copied server-side
+    pushdown: bool = False
+    # Ship a subset: a WHERE predicate on the source, a row cap, and/or a stable sample
+    # of rows chosen by a hash of the primary key (the same rows on every run)
+    where: Optional[str] = None
+    row_limit: Optional[int] = Field(default=None, gt=0)
+    sample_percent: Optional[float] = Field(default=None, gt=0, le=100)
+    
+    @field_validator("where")
+    @classmethod
+    def validate_where(cls, where: Optional[str]) -> Optional[str]:
+        """Allow a single boolean expression over the source table's columns"""
+        if where is None or not where.strip():
+            return None
+        unquoted = _SQL_STRING.sub("''", where)
+        if "'" in unquoted.replace("''", "") or '"' in unquoted:
+            raise ValueError("where has an unterminated string literal")
+        if _FORBIDDEN_SQL.search(unquoted):
+            raise ValueError("where may not contain statement separators, comments, subqueries or file/sleep functions")
+        depth = 0
+        for char in unquoted:
+            depth += {"(": 1, ")": -1}.get(char, 0)
+            if depth < 0:
+                break
+        if depth != 0:
+            raise ValueError("where has unbalanced parentheses")
+        return where.strip()
+    
+    @model_validator(mode="after")
+    def validate_pushdown(self) -> "ShippingRequest":
+        if self.pushdown and self.resumable:
+            raise ValueError("pushdown ships cannot be resumable")
+        return self
+
+class DatabaseShippingRequest(BaseModel):
+    source_database: str
+    target_database: str
+    # Table name -> masking config; each table ships to a table of the same name
+    tables: Dict[str, Dict[str, str]]
+    # Tables shipped at once; unset falls back to Config.SHIP_TABLE_PARALLELISM
+    parallelism: Optional[int] = Field(default=None, gt=0)
+    create_table_if_not_exists: bool = True
+    chunk_size: Optional[int] = Field(default=None, gt=0)
+    masking_workers: Optional[int] = Field(default=None, gt=0)
+    insert_mode: Optional[Literal["insert", "load_data"]] = None
+    resumable: bool = False
+    refresh_strategy: Optional[Literal["delete", "truncate", "swap"]] = None
+    pushdown: bool = False
+    
+    @model_validator(mode="after")
+    def validate_pushdown(self) -> "DatabaseShippingRequest":
+        if self.pushdown and self.resumable:
+            raise ValueError("pushdown ships cannot be resumable")
+        return self
+    
+    def table_request(self, table_name: str) -> ShippingRequest:
+        """Single-table ship request for one table of this database ship"""
+        return ShippingRequest(
+            source_database=self.source_database,
+            source_table=table_name,
+            target_database=self.target_database,
+            target_table=table_name,
+            masking_config=self.tables[table_name],
+            create_table_if_not_exists=self.create_table_if_not_exists,
+            chunk_size=self.chunk_size,
+            masking_workers=self.masking_workers,
+            insert_mode=self.insert_mode,
+            resumable=self.resumable,
+            refresh_strategy=self.refresh_strategy,
+            pushdown=self.pushdown
+        )
 
 class MaskingType(BaseModel):
     type: str
@@ -52,6 +150,8 @@ class DataPreview(BaseModel):
     masked_data: List[Dict[str, Any]]
     columns: List[ColumnInfo]
     masking_config: Dict[str, str]
+    # Per column and masking type timings, with /preview?profile=true
+    profile: Optional[Dict[str, Any]] = None
 
 class ShippingResult(BaseModel):
     success: bool
@@ -59,3 +159,32 @@ class ShippingResult(BaseModel):
     records_transferred: int
     target_database: str
     target_table: str
+
+class ShipCheckpoint(BaseModel):
+    last_key: List[Any]
+    rows_written: int
+
+class ShipJob(BaseModel):
+    job_id: str
+    request: ShippingRequest
+    status: Literal["queued", "running", "completed", "failed", "cancelled"] = "queued"
+    phase: str = "queued"
+    rows_read: int = 0
+    rows_masked: int = 0
+    rows_written: int = 0
+    total_rows_estimate: Optional[int] = None
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+    result: Optional[ShippingResult] = None
+    checkpoint: Optional[ShipCheckpoint] = None
+    # Seconds the ship thread spent in each phase
+    phase_seconds: Dict[str, float] = {}
+    # Service process that queued the job; pids are reused, so owner_id tells restarts apart
+    owner_pid: Optional[int] = None
+    owner_id: Optional[str] = None
+
+class ShipJobStatus(ShipJob):
+    rows_per_second: Optional[float] = None
+    eta_seconds: Optional[float] = None
@@ -1,7 +1,8 @@
 import uvicorn
-from main import app
 
 if __name__ == "__main__":
+    # The app is imported by uvicorn from "main:app", never at module level: masking
+    # worker processes are spawned and re-import this module as their __main__
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
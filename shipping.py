@@ -0,0 +1,388 @@
+import itertools
+import logging
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterable, Iterator, List
+from config import Config
+from database import DatabaseManager
+from jobs import JobStore, JobTracker, ShipCancelled, ShipJob
+from masking import DataMasker
+from mapping_cache import MappingCache
+from masking_executor import MaskingExecutor
+from models import DatabaseShippingRequest, ShippingRequest, ShippingResult
+
+logger = logging.getLogger(__name__)
+
+class ShippingError(ValueError):
+    """Raised when a ship request cannot be carried out as requested"""
+
+def _track_chunks(chunks: Iterable[List[Dict[str, Any]]], tracker: JobTracker, counter: str, next_phase: str) -> Iterator[List[Dict[str, Any]]]:
+    """Count rows leaving one pipeline stage and stop early if the job was cancelled"""
+    for chunk in chunks:
+        tracker.check_cancelled()
+        tracker.add(**{counter: len(chunk)})
+        tracker.set_phase(next_phase)
+        yield chunk
+
+def ship_table(request: ShippingRequest, db_manager: DatabaseManager, data_masker: DataMasker,
+               tracker: JobTracker = None) -> ShippingResult:
+    """Read, mask and write one table; blocking, run it off the event loop"""
+    tracker = tracker or JobTracker()
+    try:
+        total_rows_estimate = db_manager.estimate_row_count(request.source_database, request.source_table)
+        if total_rows_estimate is not None and request.sample_percent:
+            total_rows_estimate = int(total_rows_estimate * request.sample_percent / 100)
+        if total_rows_estimate is not None and request.row_limit:
+            total_rows_estimate = min(total_rows_estimate, request.row_limit)
+    except Exception as e:
+        logger.warning(f"Could not estimate row count: {str(e)}")
+        total_rows_estimate = None
+    tracker.start(total_rows_estimate)
+
+    # Stream source table in chunks so memory is bounded by chunk size
+    tracker.set_phase("reading")
+    chunk_size = request.chunk_size or Config.SHIP_CHUNK_SIZE
+    checkpoint = None
+    key_columns = []
+    masked_columns = []
+    if request.pushdown:
+        key_columns, masked_columns = _pushdown_columns(request, db_manager, data_masker)
+        source_chunks = db_manager.stream_query(
+            request.source_database,
+            _source_query(request, key_columns + masked_columns, key_columns),
+            chunk_size
+        )
+    elif request.resumable:
+        key_columns = db_manager.get_primary_key(request.source_database, request.source_table)
+        if not key_columns:
+            raise ShippingError(f"Resumable ships need a primary key on {request.source_table}")
+        checkpoint = tracker.resume_from()
+        source_chunks = db_manager.stream_keyset(
+            request.source_database,
+            request.source_table,
+            key_columns,
+            chunk_size,
+            checkpoint.last_key if checkpoint else None,
+            _row_filter(request, key_columns)
+        )
+        if request.row_limit:
+            # Rows come in key order, so the cap picks the same rows after a resume
+            source_chunks = _limit_chunks(source_chunks, request.row_limit - (checkpoint.rows_written if checkpoint else 0))
+    else:
+        if request.sample_percent or request.row_limit:
+            key_columns = db_manager.get_primary_key(request.source_database, request.source_table)
+        source_chunks = db_manager.stream_query(
+            request.source_database,
+            _source_query(request, ["*"], key_columns),
+            chunk_size
+        )
+
+    # Closed explicitly so a failed or cancelled ship stops the source query rather than draining it
+    try:
+        strategy = request.refresh_strategy or Config.TARGET_REFRESH_STRATEGY
+        records_transferred = checkpoint.rows_written if checkpoint else 0
+        first_chunk = next(source_chunks, None)
+        if not first_chunk:
+            if checkpoint:
+                # Everything was committed before the job stopped; only the swap may be left
+                if strategy == "swap":
+                    _swap_in(request, db_manager, tracker)
+                return _shipping_result(request, records_transferred)
+            raise ShippingError("No data found in source table")
+
+        # A resumed ship keeps the rows committed before it stopped
+        if checkpoint is None:
+            try:
+                _prepare_target(request, db_manager, tracker, strategy)
+            finally:
+                db_manager.invalidate_metadata(request.target_database)
+        load_table = _shadow_table(request.target_table) if strategy == "swap" else request.target_table
+        # Pushdown masks into a staging table that is joined with the source at the end
+        write_table = load_table
+        if request.pushdown:
+            write_table = _staging_table(request.target_table)
+            _create_staging(request, db_manager, write_table, key_columns, masked_columns)
+
+        # Job-scoped cache keeps this ship's mappings out of the shared cache
+        masker = data_masker
+        if request.cache_scope == "job":
+            masker = DataMasker(mapping_cache=MappingCache())
+
+        # Source keys of chunks in flight, matched in order to the masked chunks written
+        pending_keys = deque()
+
+        def read_chunks():
+            for chunk in itertools.chain([first_chunk], source_chunks):
+                if request.resumable:
+                    pending_keys.append([chunk[-1][col] for col in key_columns])
+                yield chunk
+
+        # Mask and insert chunk by chunk
+        try:
+            with MaskingExecutor(request.masking_workers) as executor, db_manager.bulk_writer(
+                request.target_database,
+                write_table,
+                request.insert_mode,
+                request.insert_batch_size,
+                request.commit_interval,
+                strategy == "swap" and not request.pushdown
+            ) as writer:
+                tracked_chunks = _track_chunks(read_chunks(), tracker, "read", "masking")
+                masked_chunks = executor.map_chunks(tracked_chunks, request.masking_config, masker)
+                # The chunk after a checkpoint may already be committed, wholly or up to a commit
+                # interval, if the job stopped before recording it; rewriting it must not fail
+                overlaps_committed = checkpoint is not None
+                for masked_chunk in _track_chunks(masked_chunks, tracker, "masked", "writing"):
+                    writer.write(masked_chunk, skip_duplicates=overlaps_committed)
+                    overlaps_committed = False
+                    records_transferred += len(masked_chunk)
+                    if request.resumable:
+                        # Commit every chunk so the checkpoint never runs ahead of the target
+                        writer.commit()
+                        tracker.checkpoint(pending_keys.popleft(), records_transferred)
+                    tracker.add(written=len(masked_chunk))
+                    tracker.set_phase("reading")
+        
+            if request.pushdown:
+                records_transferred = _copy_through_staging(request, db_manager, tracker, load_table, write_table,
+                                                            key_columns, masked_columns)
+        finally:
+            if masker is not data_masker:
+                masker.mapping_cache.clear()
+            if request.pushdown:
+                try:
+                    db_manager.execute_statement(request.target_database, f"DROP TABLE IF EXISTS {write_table}")
+                except Exception as e:
+                    logger.warning(f"Could not drop staging table {write_table}: {str(e)}")
+
+        if strategy == "swap":
+            _swap_in(request, db_manager, tracker)
+
+        logger.info(f"Successfully shipped {records_transferred} records to {request.target_database}.{request.target_table}")
+
+        return _shipping_result(request, records_transferred)
+    finally:
+        source_chunks.close()
+
+def _row_filter(request: ShippingRequest, key_columns: List[str]) -> str:
+    """Predicate selecting the requested subset of source rows, or "" for all rows"""
+    conditions = []
+    if request.where:
+        # The query runs through text(), where an unescaped colon would start a bind parameter
+        where = request.where.replace(":", "\\:")
+        conditions.append(f"({where})")
+    if request.sample_percent and request.sample_percent < 100:
+        if not key_columns:
+            raise ShippingError(f"Sampling needs a primary key on {request.source_table}")
+        # Hashing the key rather than RAND() keeps the same rows on every run
+        threshold = round(request.sample_percent * 100)
+        conditions.append(f"MOD(CRC32(CONCAT_WS(',', {', '.join(key_columns)})), 10000) < {threshold}")
+    return " AND ".join(conditions)
+
+def _source_query(request: ShippingRequest, columns: List[str], key_columns: List[str]) -> str:
+    """SELECT for the source rows to ship, with the row filter and row limit pushed down"""
+    query = f"SELECT {', '.join(columns)} FROM {request.source_table}"
+    row_filter = _row_filter(request, key_columns)
+    if row_filter:
+        query += f" WHERE {row_filter}"
+    if request.row_limit:
+        if key_columns:
+            # Without an order the capped rows could differ between runs
+            query += f" ORDER BY {', '.join(key_columns)}"
+        query += f" LIMIT {request.row_limit}"
+    return query
+
+def _limit_chunks(chunks: Iterable[List[Dict[str, Any]]], remaining: int) -> Iterator[List[Dict[str, Any]]]:
+    """Stop a chunk stream after a number of rows"""
+    for chunk in chunks:
+        if remaining <= 0:
+            return
+        yield chunk[:remaining]
+        remaining -= len(chunk)
+
+def _shadow_table(table_name: str) -> str:
+    return f"{table_name}__shadow"
+
+def _staging_table(table_name: str) -> str:
+    return f"{table_name}__masked"
+
+def _pushdown_columns(request: ShippingRequest, db_manager: DatabaseManager, data_masker: DataMasker):
+    """Primary key and masked columns of the source, the only ones a pushdown ship reads"""
+    key_columns = db_manager.get_primary_key(request.source_database, request.source_table)
+    if not key_columns:
+        raise ShippingError(f"Pushdown ships need a primary key on {request.source_table}")
+    columns = [col["name"] for col in db_manager.get_table_columns(request.source_database, request.source_table)]
+    masked = {column for column, _, _ in data_masker.compile_masking_plan(request.masking_config)}
+    masked_columns = [column for column in columns if column in masked and column not in key_columns]
+    if any(column in masked for column in key_columns):
+        raise ShippingError("Pushdown ships join on the primary key, so it cannot be masked")
+    if not masked_columns:
+        raise ShippingError(f"None of the masked columns exist in {request.source_table}")
+    return key_columns, masked_columns
+
+def _create_staging(request: ShippingRequest, db_manager: DatabaseManager, staging: str,
+                    key_columns: List[str], masked_columns: List[str]):
+    """Empty table with the source's types for the primary key and masked columns"""
+    db_manager.execute_statement(request.target_database, f"DROP TABLE IF EXISTS {staging}")
+    db_manager.execute_statement(
+        request.target_database,
+        f"CREATE TABLE {staging} (PRIMARY KEY ({', '.join(key_columns)})) "
+        f"SELECT {', '.join(key_columns + masked_columns)} "
+        f"FROM {request.source_database}.{request.source_table} LIMIT 0"
+    )
+
+def _copy_through_staging(request: ShippingRequest, db_manager: DatabaseManager, tracker: JobTracker,
+                          load_table: str, staging: str, key_columns: List[str], masked_columns: List[str]) -> int:
+    """Insert full rows server-side: masked columns from staging, every other column straight from the source"""
+    tracker.set_phase("copying")
+    columns = [col["name"] for col in db_manager.get_table_columns(request.source_database, request.source_table)]
+    select = ', '.join(f"stg.{column}" if column in masked_columns else f"src.{column}" for column in columns)
+    join = ' AND '.join(f"src.{column} = stg.{column}" for column in key_columns)
+    return db_manager.execute_statement(
+        request.target_database,
+        f"INSERT INTO {load_table} ({', '.join(columns)}) "
+        f"SELECT {select} FROM {request.source_database}.{request.source_table} AS src "
+        f"JOIN {staging} AS stg ON {join}"
+    )
+
+def _prepare_target(request: ShippingRequest, db_manager: DatabaseManager, tracker: JobTracker, strategy: str):
+    """Create and clear the table the ship loads into"""
+    tracker.set_phase("preparing")
+    source = f"{request.source_database}.{request.source_table}"
+
+    if strategy == "swap":
+        # Build a fresh copy beside the target; readers keep the old table until the swap
+        shadow = _shadow_table(request.target_table)
+        like = request.target_table if db_manager.table_exists(request.target_database, request.target_table) else source
+        db_manager.execute_statement(request.target_database, f"DROP TABLE IF EXISTS {shadow}")
+        db_manager.execute_statement(request.target_database, f"CREATE TABLE {shadow} LIKE {like}")
+        return
+
+    # Create target table if requested (copy structure)
+    if request.create_table_if_not_exists:
+        try:
+            db_manager.execute_statement(
+                request.target_database,
+                f"CREATE TABLE IF NOT EXISTS {request.target_table} LIKE {source}"
+            )
+        except Exception as e:
+            logger.warning(f"Could not create table structure: {str(e)}")
+
+    # Clear target table before inserting. Foreign key checks are off for the session: tables
+    # are loaded parents first, so a child's old rows still reference the parent being cleared
+    if strategy == "truncate":
+        try:
+            db_manager.execute_statement(request.target_database, f"TRUNCATE TABLE {request.target_table}",
+                                         foreign_key_checks=False)
+            return
+        except Exception as e:
+            logger.warning(f"Could not truncate target table, deleting rows instead: {str(e)}")
+    try:
+        db_manager.execute_statement(request.target_database, f"DELETE FROM {request.target_table}",
+                                     foreign_key_checks=False)
+    except Exception as e:
+        # Loading on top of the old rows would fail on duplicate keys or mix old and new data
+        raise ShippingError(f"Could not clear target table {request.target_table}: {str(e)}")
+
+def _swap_in(request: ShippingRequest, db_manager: DatabaseManager, tracker: JobTracker):
+    """Atomically replace the target with the loaded shadow table"""
+    tracker.set_phase("swapping")
+    shadow = _shadow_table(request.target_table)
+    # The target must be looked up fresh and the renamed tables must not be served from cache
+    db_manager.invalidate_metadata(request.target_database)
+    if db_manager.table_exists(request.target_database, request.target_table):
+        retired = f"{request.target_table}__old"
+        # Children's foreign keys follow the target to its retired name and would block the drops
+        db_manager.execute_statement(request.target_database, f"DROP TABLE IF EXISTS {retired}",
+                                     foreign_key_checks=False)
+        db_manager.execute_statement(
+            request.target_database,
+            f"RENAME TABLE {request.target_table} TO {retired}, {shadow} TO {request.target_table}",
+            foreign_key_checks=False
+        )
+        db_manager.execute_statement(request.target_database, f"DROP TABLE {retired}", foreign_key_checks=False)
+    else:
+        db_manager.execute_statement(request.target_database, f"RENAME TABLE {shadow} TO {request.target_table}")
+    db_manager.invalidate_metadata(request.target_database)
+
+def _shipping_result(request: ShippingRequest, records_transferred: int) -> ShippingResult:
+    return ShippingResult(
+        success=True,
+        message="Data shipped successfully",
+        records_transferred=records_transferred,
+        target_database=request.target_database,
+        target_table=request.target_table
+    )
+
+def run_ship_job(job: ShipJob, store: JobStore, db_manager: DatabaseManager, data_masker: DataMasker):
+    """Execute a queued ship job, recording its outcome in the job store"""
+    tracker = JobTracker(store, job)
+    try:
+        if store.is_cancelled(job.job_id):
+            tracker.fail("Cancelled before start", status="cancelled")
+            return
+        result = ship_table(job.request, db_manager, data_masker, tracker)
+        tracker.complete(result)
+    except ShipCancelled as e:
+        logger.info(str(e))
+        tracker.fail(str(e), status="cancelled")
+    except Exception as e:
+        logger.error(f"Error shipping data for job {job.job_id}: {str(e)}")
+        tracker.fail(str(e))
+    finally:
+        store.finish(job.job_id)
+
+def run_database_ship(request: DatabaseShippingRequest, jobs: Dict[str, ShipJob], store: JobStore,
+                      db_manager: DatabaseManager):
+    """Ship several tables, parents before the tables whose foreign keys reference them"""
+    try:
+        dependencies = db_manager.get_table_dependencies(request.source_database)
+    except Exception as e:
+        logger.warning(f"Could not read foreign keys, shipping tables in any order: {str(e)}")
+        dependencies = {}
+
+    # One cache for the whole database keeps IDs consistent across tables and is freed at the end
+    masker = DataMasker(mapping_cache=MappingCache())
+    waiting = {
+        table: {parent for parent in dependencies.get(table, []) if parent in jobs and parent != table}
+        for table in jobs
+    }
+    running = {}
+    shipped, failed = set(), set()
+
+    try:
+        with ThreadPoolExecutor(max_workers=request.parallelism or Config.SHIP_TABLE_PARALLELISM,
+                                thread_name_prefix="ship-table") as pool:
+            while waiting or running:
+                for table in [table for table, parents in waiting.items() if parents & failed]:
+                    del waiting[table]
+                    failed.add(table)
+                    JobTracker(store, jobs[table]).fail("Skipped because a table it references failed to ship")
+                    store.finish(jobs[table].job_id)
+
+                ready = [table for table, parents in waiting.items() if not parents - shipped]
+                if not ready and not running and waiting:
+                    # Foreign key cycle: nothing can go first, so ship what is left together
+                    logger.warning(f"Foreign key cycle between tables {sorted(waiting)}")
+                    ready = list(waiting)
+                for table in ready:
+                    del waiting[table]
+                    running[pool.submit(run_ship_job, jobs[table], store, db_manager, masker)] = table
+
+                if not running:
+                    continue
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    table = running.pop(future)
+                    job = store.get(jobs[table].job_id)
+                    (shipped if job and job.status == "completed" else failed).add(table)
+    except Exception as e:
+        logger.error(f"Database ship {request.source_database} -> {request.target_database} aborted: {str(e)}")
+        for table in waiting:
+            JobTracker(store, jobs[table]).fail(f"Database ship aborted: {str(e)}")
+            store.finish(jobs[table].job_id)
+    finally:
+        masker.mapping_cache.clear()
+
+    logger.info(f"Database ship {request.source_database} -> {request.target_database} finished: "
+                f"{len(shipped)} tables shipped, {len(failed)} failed")
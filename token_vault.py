@@ -0,0 +1,75 @@
+import hashlib
+import sqlite3
+import threading
+from typing import Any, Dict, List, Tuple
+from config import Config
+
+# Stay well below SQLite's bound parameter limit
+_LOOKUP_BATCH = 500
+
+class TokenVault:
+    """Persistent original -> masked token store in a local SQLite file.
+
+    Originals are never stored: rows are keyed by masking type and a keyed
+    BLAKE2b digest of the original's type and string form. WAL mode lets ship
+    threads, masking worker processes and later restarts share one file.
+    """
+
+    def __init__(self, path: str = None, secret_key: str = None):
+        self.path = path or Config.TOKEN_VAULT_PATH
+        self._key = (secret_key or Config.SECRET_KEY).encode()[:64]
+        self._local = threading.local()
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS tokens ("
+            "namespace TEXT NOT NULL, digest BLOB NOT NULL, masked, "
+            "PRIMARY KEY (namespace, digest)) WITHOUT ROWID"
+        )
+        connection.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = sqlite3.connect(self.path, timeout=30)
+        return connection
+
+    def digest(self, value: Any) -> bytes:
+        """Keyed digest identifying an original value"""
+        return hashlib.blake2b(
+            f"{type(value).__name__}:{value}".encode(), digest_size=16, key=self._key
+        ).digest()
+
+    def get_many(self, namespace: str, digests: List[bytes]) -> Dict[bytes, Any]:
+        """Look up stored tokens for a batch of digests"""
+        found = {}
+        connection = self._connection()
+        for start in range(0, len(digests), _LOOKUP_BATCH):
+            batch = digests[start:start + _LOOKUP_BATCH]
+            placeholders = ', '.join('?' * len(batch))
+            rows = connection.execute(
+                f"SELECT digest, masked FROM tokens WHERE namespace = ? AND digest IN ({placeholders})",
+                [namespace, *batch]
+            )
+            found.update(rows)
+        return found
+
+    def put_many(self, namespace: str, tokens: List[Tuple[bytes, Any]]):
+        """Store new tokens; existing entries win so every worker agrees on one value"""
+        if not tokens:
+            return
+        connection = self._connection()
+        connection.executemany(
+            "INSERT OR IGNORE INTO tokens (namespace, digest, masked) VALUES (?, ?, ?)",
+            [(namespace, digest, masked) for digest, masked in tokens]
+        )
+        connection.commit()
+
+    def clear(self, namespace: str = None):
+        """Forget stored tokens, e.g. after changing a masking type's output"""
+        connection = self._connection()
+        if namespace is None:
+            connection.execute("DELETE FROM tokens")
+        else:
+            connection.execute("DELETE FROM tokens WHERE namespace = ?", (namespace,))
+        connection.commit()